@@ -0,0 +1,126 @@
+"""
+Time and peak memory of the journal export on a synthetic multi-year journal.
+
+Usage: python benchmarks/bench_export.py [--years 10] [--habits 20] [--legacy]
+
+Each format is exported in a fresh subprocess so the peak RSS is that
+export's own; growth is that peak minus the RSS after django.setup() (it
+levels off at SQLite's page cache). --legacy adds the old in-memory
+Workbook with one HabitLog query per cell (slow: days x habits queries).
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "webapp"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "user_monitoring.settings")
+
+import django  # noqa: E402
+
+
+def legacy_export():
+    import openpyxl
+    from django.http import HttpResponse
+    from monitor.models import DailyEntry, Habit, HabitLog
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    habits = list(Habit.objects.all().order_by('order'))
+    sheet.append(['Date'] + [h.name for h in habits] + ['Loved Someone', 'Daily Summary'])
+    for entry in DailyEntry.objects.all().order_by('date'):
+        row = [entry.date.strftime('%Y-%m-%d')]
+        for habit in habits:
+            log = HabitLog.objects.filter(entry=entry, habit=habit).first()
+            row.append('Yes' if log and log.completed else 'No')
+        row.extend([entry.loved_someone, entry.daily_summary])
+        sheet.append(row)
+    response = HttpResponse()
+    workbook.save(response)
+    return len(response.content)
+
+
+def streaming_export(fmt):
+    from monitor.export import export_response
+    from monitor.models import Habit
+
+    response = export_response(fmt, Habit.objects.all().order_by('order'))
+    return sum(len(chunk) for chunk in response.streaming_content)
+
+
+def peak_rss_kb():
+    # VmHWM is per address space; ru_maxrss would include the parent's peak at fork time
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_one(db, fmt):
+    """Subprocess entry point: export once and print bytes, seconds, peak RSS and its growth (MB)."""
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = db
+    django.setup()
+    from monitor import export  # noqa: F401  (import cost is not the export's)
+
+    baseline_kb = peak_rss_kb()
+    start = time.perf_counter()
+    size = legacy_export() if fmt == "legacy" else streaming_export(fmt)
+    seconds = time.perf_counter() - start
+    peak_kb = peak_rss_kb()
+    print(size, seconds, peak_kb / 1024, (peak_kb - baseline_kb) / 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--legacy", action="store_true")
+    parser.add_argument("--run-one", nargs=2, metavar=("DB", "FORMAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_one:
+        return run_one(*args.run_one)
+
+    from django.conf import settings
+
+    workdir = Path(tempfile.mkdtemp())
+    db = workdir / "export.sqlite3"
+    settings.DATABASES["default"]["NAME"] = db
+    django.setup()
+
+    from bench_sqlite import seed
+    from django.core.management import call_command
+    from django.db import connection
+    from monitor.models import DailyEntry
+
+    call_command("migrate", verbosity=0)
+    seed(args.years * 365, args.habits)
+    DailyEntry.objects.update(daily_summary="Lorem ipsum dolor sit amet, " * 8)
+    connection.close()
+
+    print(f"{args.years} years x {args.habits} habits")
+    print(f"{'format':<10} {'size MB':>10} {'seconds':>10} {'peak RSS MB':>12} {'growth MB':>10}")
+    formats = ["xlsx", "csv", "ndjson"] + (["legacy"] if args.legacy else [])
+    for fmt in formats:
+        out = subprocess.run(
+            [sys.executable, __file__, "--run-one", str(db), fmt], capture_output=True, text=True, check=True
+        ).stdout.split()
+        size, seconds, peak, growth = int(out[0]), float(out[1]), float(out[2]), float(out[3])
+        print(f"{fmt:<10} {size / 1e6:>10.1f} {seconds:>10.2f} {peak:>12.1f} {growth:>10.1f}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Latency of the full-text search on a synthetic journal with written summaries.
+
+Usage: python benchmarks/bench_search.py [--years 10] [--words 60] [--runs 20]
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "webapp"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "user_monitoring.settings")
+
+import django  # noqa: E402
+
+# Zipf-ish vocabulary: a few very common words, a long tail of rare ones
+VOCABULARY = [f"word{i}" for i in range(5000)]
+WEIGHTS = [1 / (i + 1) for i in range(len(VOCABULARY))]
+QUERIES = ["word1", "word10 word200", "word4999", "word12", "word3 word40 word7"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    workdir = Path(tempfile.mkdtemp())
+    settings.DATABASES["default"]["NAME"] = workdir / "search.sqlite3"
+    django.setup()
+
+    from django.core.management import call_command
+    from monitor.models import DailyEntry
+    from monitor.search import search
+
+    call_command("migrate", verbosity=0)
+    rng = random.Random(1)
+    days = args.years * 365
+    start = date.today() - timedelta(days=days)
+    seeded = time.perf_counter()
+    DailyEntry.objects.bulk_create(
+        [
+            DailyEntry(date=start + timedelta(days=d), daily_summary=" ".join(rng.choices(VOCABULARY, WEIGHTS, k=args.words)))
+            for d in range(days)
+        ],
+        batch_size=1000,
+    )
+    print(f"indexed {days} entries x {args.words} words in {time.perf_counter() - seeded:.1f} s")
+
+    for query in QUERIES:
+        search(query)  # warm the page cache
+        samples = []
+        for _ in range(args.runs):
+            began = time.perf_counter()
+            search(query)
+            samples.append((time.perf_counter() - began) * 1000)
+        print(f"{query!r:24} {statistics.median(samples):8.1f} ms  (max {max(samples):.1f})")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
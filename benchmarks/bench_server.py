@@ -0,0 +1,75 @@
+"""
+Compare the embedded server backends.
+
+Usage: PYTHONPATH=src python benchmarks/bench_server.py [--clients 6] [--requests 200]
+
+Each client mimics a page's fetch() calls: it reuses one connection while the
+server allows it and reconnects when the server closes it.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+
+from lifemonitor.server import SERVER_BACKENDS, make_server
+
+
+def app(environ, start_response):
+    body = b'{"ok": true}' * 64
+    # Simulate a small amount of view work
+    time.sleep(0.002)
+    start_response('200 OK', [('Content-type', 'application/json')])
+    return [body]
+
+
+def run_client(host, port, count, latencies):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    for _ in range(count):
+        start = time.perf_counter()
+        conn.request("GET", "/api/calendar-tasks/")
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.getheader("Connection") == "close" or response.version == 10:
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.close()
+
+
+def bench(backend, clients, requests):
+    server = make_server(app, backend=backend)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.socket.getsockname()
+
+    latencies = []
+    threads = [
+        threading.Thread(target=run_client, args=(host, port, requests, latencies))
+        for _ in range(clients)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    server.close_gracefully()
+
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    return len(latencies) / elapsed, p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=6)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'req/s':>10} {'p95 ms':>10}")
+    for backend in SERVER_BACKENDS:
+        rps, p95 = bench(backend, args.clients, args.requests)
+        print(f"{backend:<10} {rps:>10.0f} {p95:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
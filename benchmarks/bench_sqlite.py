@@ -0,0 +1,102 @@
+"""
+Latency of chart_view / input_view under each SQLite connection profile.
+
+Usage: python benchmarks/bench_sqlite.py [--days 365] [--habits 10] [--runs 10]
+
+"stock" is SQLite's defaults with a new connection per request (the old
+behaviour); the presets add their PRAGMAs and keep persistent connections.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "webapp"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "user_monitoring.settings")
+
+import django  # noqa: E402
+
+
+def seed(days, habits):
+    from monitor.models import DailyEntry, Habit, HabitLog
+    from monitor.scoring import rebuild_daily_scores
+
+    habit_objs = Habit.objects.bulk_create(
+        [Habit(name=f"Habit {i}", positive_score=1 + i % 3, negative_score=-(i % 2), order=i) for i in range(habits)]
+    )
+    start = date.today() - timedelta(days=days)
+    entries = DailyEntry.objects.bulk_create(
+        [DailyEntry(date=start + timedelta(days=d), loved_someone=f"Person {d % 7}") for d in range(days)]
+    )
+    HabitLog.objects.bulk_create(
+        [HabitLog(entry=e, habit=h, completed=(e.id + h.id) % 3 != 0) for e in entries for h in habit_objs],
+        batch_size=5000,
+    )
+    # bulk_create skips the signals that maintain DailyScore
+    rebuild_daily_scores()
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), statistics.quantiles(samples, n=20)[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--habits", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    workdir = Path(tempfile.mkdtemp())
+    base_db = workdir / "base.sqlite3"
+    settings.DATABASES["default"]["NAME"] = base_db
+    # Measure the queries, not the response cache (and keep out of the user's cache file)
+    settings.CACHES.pop("analytics", None)
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from user_monitoring import response_cache
+
+    settings.SQLITE_PROFILE = "stock"
+    call_command("migrate", verbosity=0)
+    seed(args.days, args.habits)
+    user = User.objects.create_user("bench", password="bench")
+    connection.close()
+
+    print(f"{args.days} days x {args.habits} habits, {args.runs} runs (median / p95 ms)")
+    print(f"{'profile':<20} {'chart_view':>20} {'input_view POST':>20}")
+    for profile, max_age in [("stock", 0), ("android-low-memory", 600), ("desktop", 600)]:
+        db = workdir / f"{profile}.sqlite3"
+        shutil.copy(base_db, db)
+        settings.DATABASES["default"]["NAME"] = db
+        settings.DATABASES["default"]["CONN_MAX_AGE"] = max_age
+        settings.SQLITE_PROFILE = profile
+        connection.close()
+
+        client = Client()
+        client.force_login(user)
+        chart = timed(lambda: (response_cache.cache.clear(), client.get("/chart/")), args.runs)
+        save = timed(lambda: client.post("/input/", {"loved_someone": "x", "daily_summary": "y"}), args.runs)
+        print(f"{profile:<20} {chart[0]:>10.1f} / {chart[1]:<8.1f} {save[0]:>10.1f} / {save[1]:<8.1f}")
+        connection.close()
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
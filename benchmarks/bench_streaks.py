@@ -0,0 +1,64 @@
+"""
+Time of the streak engine on a synthetic journal.
+
+Usage: python benchmarks/bench_streaks.py [--years 10] [--habits 50] [--runs 20]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "webapp"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "user_monitoring.settings")
+
+import django  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--habits", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    workdir = Path(tempfile.mkdtemp())
+    settings.DATABASES["default"]["NAME"] = workdir / "streaks.sqlite3"
+    django.setup()
+
+    from bench_sqlite import seed
+    from django.core.management import call_command
+    from monitor.streaks import habit_streaks, load_bitsets
+
+    call_command("migrate", verbosity=0)
+    seed(args.years * 365, args.habits)
+    habit_streaks()  # warm the connection and page cache
+
+    samples, load = [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        load_bitsets(date_today())
+        load.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        habit_streaks()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{args.years} years x {args.habits} habits, median of {args.runs} runs")
+    print(f"load_bitsets  {statistics.median(load):8.1f} ms")
+    print(f"habit_streaks {statistics.median(samples):8.1f} ms")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def date_today():
+    from django.utils import timezone
+
+    return timezone.now().date()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
+from lifemonitor.boot import profiler
+
+# Start the boot clock before Django/Toga are imported
+profiler.start()
+
 from lifemonitor.app import main
 
+profiler.mark("app_imported")
+
 if __name__ == '__main__':
     main().main_loop()
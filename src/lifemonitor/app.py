@@ -1,24 +1,26 @@
 import os
 import sys
-import socketserver
+import atexit
 import time
 import threading
 import asyncio
 import json
 import logging
 from pathlib import Path
-from wsgiref.simple_server import WSGIServer
+from html import escape as html_escape
 from urllib.parse import parse_qs
 from urllib.request import urlopen
 from urllib.error import URLError
 
 import django
 from django.core.handlers.wsgi import WSGIHandler
-from django.core.servers.basehttp import WSGIRequestHandler
 from django.core.management import call_command
 
 import toga
 
+from lifemonitor.boot import profiler as boot_profiler
+from lifemonitor.server import make_server, DEFAULT_BACKEND
+
 # --- LOGGING SETUP ---
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +29,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger("LifeMonitor")
 
+BOOT_PROFILE_PATH = "/__lifemonitor__/boot.json"
+READY_PATH = "/__lifemonitor__/ready"
+READY_POLL_TIMEOUT = 25
+
 # Placeholder variables for Android classes
 Environment = None
 Intent = None
@@ -34,18 +40,18 @@ Settings = None
 Uri = None
 Build = None
 
-class ThreadedWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
-    """Handle requests in a separate thread."""
-    pass
-
 class Lifemonitor(toga.App):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.server_mode = "SETUP" # Options: SETUP, LOADING, DJANGO
+        self.server_mode = "SETUP" # Options: SETUP, LOADING, DJANGO, ERROR
         self.django_app = None
         self.setup_error = None
         self._httpd = None
+        self.static_assets = None
+        # Boot progress for the loading screen's long-poll
+        self.boot_events = []
+        self._boot_cond = threading.Condition()
 
     # --- 1. THE MASTER REQUEST HANDLER ---
     def master_wsgi_handler(self, environ, start_response):
@@ -54,6 +60,21 @@ class Lifemonitor(toga.App):
         This runs inside the server thread for every request.
         """
         path = environ.get('PATH_INFO', '/')
+
+        # Internal: boot timeline (any mode)
+        if path == BOOT_PROFILE_PATH:
+            start_response('200 OK', [('Content-type', 'application/json'), ('Cache-Control', 'no-store')])
+            return [boot_profiler.to_json()]
+
+        # Internal: readiness long-poll for the loading screen (any mode)
+        if path == READY_PATH:
+            return self.handle_ready_poll(environ, start_response)
+
+        # Static files straight from memory, without waking Django (any mode)
+        if self.static_assets and path.startswith(self.static_assets.url_prefix):
+            response = self.static_assets.serve(environ, start_response)
+            if response is not None:
+                return response
         
         # A. SETUP MODE
         if self.server_mode == "SETUP":
@@ -66,13 +87,57 @@ class Lifemonitor(toga.App):
         # C. DJANGO MODE
         elif self.server_mode == "DJANGO":
             if self.django_app:
+                if not boot_profiler.finished:
+                    with boot_profiler.phase("first_request"):
+                        response = self.django_app(environ, start_response)
+                    boot_profiler.finish()
+                    return response
                 return self.django_app(environ, start_response)
             else:
                 # Fallback if Django crashed or isn't ready yet
                 return self.serve_html(start_response, self.get_loading_html())
+
+        # D. ERROR MODE
+        elif self.server_mode == "ERROR":
+            return self.serve_html(start_response, self.get_error_html(), status='500 Internal Server Error')
         
+        start_response('500 Internal Server Error', [('Content-type', 'text/plain')])
         return [b"Unknown State"]
 
+    def handle_ready_poll(self, environ, start_response):
+        """
+        Long-poll: returns boot events after ?since=N, waiting until a new one
+        arrives (or READY_POLL_TIMEOUT passes) so the loading screen reacts
+        the moment init_django flips the mode.
+        """
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        try:
+            since = int(query.get('since', ['0'])[0])
+        except ValueError:
+            since = 0
+
+        with self._boot_cond:
+            self._boot_cond.wait_for(
+                lambda: len(self.boot_events) > since or self.server_mode in ("DJANGO", "ERROR"),
+                timeout=READY_POLL_TIMEOUT,
+            )
+            payload = {
+                "mode": self.server_mode,
+                "events": self.boot_events[since:],
+                "next": len(self.boot_events),
+            }
+
+        start_response('200 OK', [('Content-type', 'application/json'), ('Cache-Control', 'no-store')])
+        return [json.dumps(payload).encode('utf-8')]
+
+    def set_boot_stage(self, stage, message="", mode=None):
+        """Record a boot event (setup, migrate, ready, error) and wake long-pollers."""
+        with self._boot_cond:
+            if mode:
+                self.server_mode = mode
+            self.boot_events.append({"stage": stage, "message": message})
+            self._boot_cond.notify_all()
+
     # --- 2. SETUP REQUEST LOGIC ---
     def handle_setup_requests(self, environ, start_response):
         query = parse_qs(environ.get('QUERY_STRING', ''))
@@ -99,8 +164,8 @@ class Lifemonitor(toga.App):
         # Default: Show Setup Screen
         return self.serve_html(start_response, self.get_setup_html())
 
-    def serve_html(self, start_response, html):
-        start_response('200 OK', [('Content-type', 'text/html; charset=utf-8')])
+    def serve_html(self, start_response, html, status='200 OK'):
+        start_response(status, [('Content-type', 'text/html; charset=utf-8')])
         return [html.encode('utf-8')]
 
     def redirect_home(self, start_response):
@@ -143,24 +208,68 @@ class Lifemonitor(toga.App):
     def init_django(self):
         logger.info("Background: Starting Django Init...")
         try:
-            # Setup
-            django.setup(set_prefix=False)
+            self.set_boot_stage("setup", "Loading app modules...")
+
+            # Setup (settings import, then app registry population)
+            with boot_profiler.phase("settings"):
+                from django.conf import settings
+                settings.INSTALLED_APPS
+            with boot_profiler.phase("app_registry"):
+                django.setup(set_prefix=False)
             
-            # Migrate
-            logger.info("Background: Running Migrations...")
-            call_command("migrate", interactive=False)
+            # Migrate (skipped when the database already has every shipped migration)
+            with boot_profiler.phase("migrate"):
+                from user_monitoring.schema import schema_is_current
+                from django.db import connection
+                is_current, schema_fp = schema_is_current()
+                if is_current:
+                    logger.info(f"Background: Schema {schema_fp} up to date, skipping migrate.")
+                    self.set_boot_stage("migrate", "Database up to date")
+                else:
+                    logger.info(f"Background: Running Migrations (schema {schema_fp})...")
+                    self.set_boot_stage("migrate", "Updating database...")
+                    call_command("migrate", interactive=False)
+                connection.close()
+            boot_profiler.mark("migrate_skipped" if is_current else "migrate_ran")
             
             # Ready
-            self.django_app = WSGIHandler()
-            self.server_mode = "DJANGO"
+            with boot_profiler.phase("wsgi_handler"):
+                self.django_app = WSGIHandler()
+            self.set_boot_stage("ready", "Ready", mode="DJANGO")
+            boot_profiler.mark("django_ready")
             logger.info("Background: Django Ready! Switched mode.")
-            
-            # [FIX] Use URL reassignment instead of .reload()
-            self.loop.call_soon_threadsafe(self.refresh_webview)
-            
+            logger.info(
+                f"Startup timing: settings={boot_profiler.phase_ms('settings')}ms "
+                f"app_registry={boot_profiler.phase_ms('app_registry')}ms "
+                f"migrate={boot_profiler.phase_ms('migrate')}ms ({'skipped' if is_current else 'ran'}) "
+                f"time_to_interactive={boot_profiler.marks['django_ready']}ms"
+            )
+            # The loading page's long-poll reloads itself as soon as the mode flips
+
+            # Pull the persisted analytics cache into memory without holding up the UI
+            threading.Thread(target=self.warm_response_cache, daemon=True).start()
+
         except Exception as e:
             logger.error(f"Django Init Error: {e}", exc_info=True)
-            self.server_mode = "ERROR" 
+            boot_profiler.mark("django_error")
+            self.setup_error = str(e)
+            self.set_boot_stage("error", self.setup_error, mode="ERROR")
+        finally:
+            # Only a successful boot reaches the first request, which finishes the profile
+            if self.server_mode != "DJANGO":
+                boot_profiler.finish()
+
+    def warm_response_cache(self):
+        try:
+            from django.db import connection
+            from user_monitoring.response_cache import warm
+            loaded = warm()
+            connection.close()
+            boot_profiler.mark("cache_warm")
+            logger.info(f"Background: Loaded {loaded} cached analytics responses.")
+        except Exception as e:
+            # A broken cache file only costs a recompute
+            logger.warning(f"Response cache warm-up failed: {e}")
 
     # --- 4. SYSTEM & ANDROID HELPERS ---
     def verify_storage_permissions_blocking(self):
@@ -231,11 +340,20 @@ class Lifemonitor(toga.App):
 
     # --- 5. APP STARTUP ---
     def startup(self):
+        boot_profiler.mark("startup")
+
         # A. Configure Python Path
         webapp_path = Path(__file__).parent.parent / "webapp"
         sys.path.append(str(webapp_path))
         os.environ["DJANGO_SETTINGS_MODULE"] = "user_monitoring.settings"
 
+        # Preload static assets (no Django needed) and let {% static %} use the hashed names
+        from user_monitoring.static_assets import ENV_FLAG, get_table
+        with boot_profiler.phase("static_assets"):
+            self.static_assets = get_table()
+        os.environ[ENV_FLAG] = "1"
+        logger.info(f"Static assets preloaded: {len(self.static_assets.manifest)} files, {self.static_assets.total_bytes()} bytes")
+
         # B. Determine Initial State
         config_path = self.paths.data / "storage_config.json"
         if config_path.exists():
@@ -251,17 +369,16 @@ class Lifemonitor(toga.App):
         else:
             self.server_mode = "SETUP"
 
-        # C. Start Server
-        self._httpd = ThreadedWSGIServer(("127.0.0.1", 0), WSGIRequestHandler)
-        self._httpd.daemon_threads = True
-        
-        # Set our app logic
-        self._httpd.set_app(self.master_wsgi_handler)
+        # C. Start Server (LIFEMONITOR_SERVER=threaded restores the old per-request threads)
+        backend = os.environ.get("LIFEMONITOR_SERVER", DEFAULT_BACKEND)
+        self._httpd = make_server(self.master_wsgi_handler, ("127.0.0.1", 0), backend)
+        atexit.register(self._httpd.close_gracefully)
         
         # Get Port
         host, port = self._httpd.socket.getsockname()
         self.local_url = f"http://{host}:{port}/"
-        logger.info(f"Server running at {self.local_url}")
+        logger.info(f"Server ({backend}) running at {self.local_url}")
+        boot_profiler.mark("server_started")
         
         # Run Server
         threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
@@ -289,14 +406,36 @@ class Lifemonitor(toga.App):
         <div style="text-align:center;font-family:sans-serif;">
             <div style="width:50px;height:50px;border:5px solid #eee;border-top:5px solid #007AFF;border-radius:50%;animation:s 1s infinite linear;margin:0 auto 20px;"></div>
             <h2>Starting LifeMonitor...</h2>
-            <p style="color:#888;">Initializing Database...</p>
+            <p id="stage" style="color:#888;">Initializing Database...</p>
         </div><style>@keyframes s{to{transform:rotate(360deg)}}</style>
         <script>
-            // Auto-reload until Django takes over
-            setTimeout(function(){ window.location.reload(); }, 2500);
+            // Wait on the readiness long-poll; reload the moment Django takes over
+            var since = 0;
+            function poll() {
+                fetch('/__lifemonitor__/ready?since=' + since, {cache: 'no-store'})
+                    .then(function(r){ return r.json(); })
+                    .then(function(data) {
+                        since = data.next;
+                        var last = data.events[data.events.length - 1];
+                        if (last && last.message) document.getElementById('stage').textContent = last.message;
+                        if (data.mode === 'DJANGO' || data.mode === 'ERROR') { window.location.reload(); return; }
+                        poll();
+                    })
+                    .catch(function(){ setTimeout(poll, 1000); });
+            }
+            poll();
         </script>
         </body></html>"""
 
+    def get_error_html(self):
+        error = html_escape(self.setup_error or "Unknown error")
+        return f"""<!DOCTYPE html><html><body style="font-family:-apple-system,sans-serif;padding:40px;text-align:center;">
+        <h2 style="color:#FF3B30;">LifeMonitor could not start</h2>
+        <p style="color:#888;">The database could not be initialized.</p>
+        <pre style="text-align:left;white-space:pre-wrap;background:#F2F2F7;padding:15px;border-radius:12px;">{error}</pre>
+        <p style="color:#888;">Restart the app to try again.</p>
+        </body></html>"""
+
     def get_permission_html(self):
         return """<!DOCTYPE html><html><body style="font-family:-apple-system,sans-serif;padding:40px;text-align:center;">
         <h2 style="color:#007AFF;">Permission Required</h2>
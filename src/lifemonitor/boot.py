@@ -0,0 +1,164 @@
+"""
+Boot timeline profiler.
+
+Records monotonic timestamps for each startup phase and, while booting, the
+cost of every module import (self and cumulative time, like `-X importtime`
+but captured in-process so it also works on Android).
+"""
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("LifeMonitor")
+
+
+class _ImportTimer:
+    """Meta path finder that times exec_module of every module loaded after start()."""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path=None, target=None):
+        # Ask the remaining finders, then time the loader they return
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        loader = spec.loader
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        # Loaders can be shared by many modules: wrap each one once
+        if getattr(loader.exec_module, "_boot_timed", False):
+            return spec
+        exec_module = loader.exec_module
+        timer = self
+
+        def timed_exec_module(module):
+            if timer not in sys.meta_path:
+                # Boot is over; the wrapper stays on the loader but stops recording
+                return exec_module(module)
+            stack = timer._stack()
+            start = time.perf_counter()
+            stack.append(0.0)
+            try:
+                exec_module(module)
+            finally:
+                children = stack.pop()
+                cumulative = time.perf_counter() - start
+                if stack:
+                    stack[-1] += cumulative
+                timer.profiler._record_import(module.__name__, cumulative - children, cumulative)
+
+        timed_exec_module._boot_timed = True
+        try:
+            loader.exec_module = timed_exec_module
+        except (AttributeError, TypeError):
+            pass
+        return spec
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+
+class BootProfiler:
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.wall_t0 = time.time()
+        self.phases = []
+        self.marks = {}
+        self.imports = []
+        self.finished = False
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def start(self):
+        """Reset the clock and begin timing imports. Call before heavy imports."""
+        self.t0 = time.monotonic()
+        self.wall_t0 = time.time()
+        if self._timer is None:
+            self._timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._timer)
+
+    def _ms(self, t):
+        return round((t - self.t0) * 1000, 2)
+
+    def mark(self, name):
+        with self._lock:
+            self.marks[name] = self._ms(time.monotonic())
+
+    @contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self.phases.append({
+                    "name": name,
+                    "start_ms": self._ms(start),
+                    "duration_ms": round((end - start) * 1000, 2),
+                    "thread": threading.current_thread().name,
+                })
+
+    def phase_ms(self, name):
+        for p in self.phases:
+            if p["name"] == name:
+                return p["duration_ms"]
+        return None
+
+    def _record_import(self, name, self_s, cumulative_s):
+        with self._lock:
+            self.imports.append((name, self_s, cumulative_s))
+
+    def finish(self):
+        """Stop timing imports and write the report to the log (once)."""
+        if self.finished:
+            return
+        try:
+            self.mark("boot_complete")
+            self.finished = True
+            logger.info(f"Boot profile: {json.dumps(self.report(top=15))}")
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop timing imports (idempotent)."""
+        if self._timer in sys.meta_path:
+            sys.meta_path.remove(self._timer)
+
+    def report(self, top=50):
+        with self._lock:
+            imports = sorted(self.imports, key=lambda i: i[1], reverse=True)
+            return {
+                "started_at": self.wall_t0,
+                "finished": self.finished,
+                "phases": list(self.phases),
+                "marks": dict(self.marks),
+                "imports": {
+                    "count": len(imports),
+                    "total_self_ms": round(sum(i[1] for i in imports) * 1000, 2),
+                    "top": [
+                        {"module": name, "self_ms": round(s * 1000, 2), "cumulative_ms": round(c * 1000, 2)}
+                        for name, s, c in imports[:top]
+                    ],
+                },
+            }
+
+    def to_json(self):
+        return json.dumps(self.report()).encode("utf-8")
+
+
+# Shared instance; __main__ starts it before importing the app.
+profiler = BootProfiler()
@@ -0,0 +1,196 @@
+import logging
+import queue
+import socket
+import socketserver
+import threading
+from wsgiref.simple_server import WSGIServer
+
+from django.core.servers.basehttp import ServerHandler, WSGIRequestHandler
+
+logger = logging.getLogger("LifeMonitor")
+
+
+# --- 1. LEGACY BACKEND ---
+class ThreadedWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    """Handle requests in a separate thread."""
+    daemon_threads = True
+
+    def close_gracefully(self, timeout=None):
+        self.shutdown()
+        self.server_close()
+
+
+# --- 2. POOLED BACKEND ---
+class PersistentServerHandler(ServerHandler):
+    """
+    Django's ServerHandler only allows keep-alive on ThreadingMixIn servers.
+    The pooled server is concurrent too, so re-apply the close rules without
+    that check.
+    """
+
+    def cleanup_headers(self):
+        super(ServerHandler, self).cleanup_headers()
+        if self.environ["REQUEST_METHOD"] == "HEAD" and "Content-Length" in self.headers:
+            del self.headers["Content-Length"]
+        if self.environ["REQUEST_METHOD"] != "HEAD" and "Content-Length" not in self.headers:
+            self.headers["Connection"] = "close"
+        if self.headers.get("Connection") == "close":
+            self.request_handler.close_connection = True
+
+
+class PersistentWSGIRequestHandler(WSGIRequestHandler):
+    """
+    HTTP/1.1 handler that keeps the connection open between requests.
+    An idle connection is dropped after `server.keepalive_timeout` seconds,
+    and released early when other connections are waiting for a worker.
+    """
+
+    def setup(self):
+        self.timeout = self.server.keepalive_timeout
+        super().setup()
+
+    def handle(self):
+        self.close_connection = True
+        try:
+            self.handle_one_request()
+            while not self.close_connection and not self.server.is_saturated():
+                self.handle_one_request()
+        except (TimeoutError, ConnectionError):
+            # Idle keep-alive expired or the WebView dropped the socket
+            pass
+        try:
+            self.connection.shutdown(socket.SHUT_WR)
+        except (AttributeError, OSError):
+            pass
+
+    def handle_one_request(self):
+        self.raw_requestline = self.rfile.readline(65537)
+        if not self.raw_requestline:
+            self.close_connection = True
+            return
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ""
+            self.request_version = ""
+            self.command = ""
+            self.send_error(414)
+            return
+
+        if not self.parse_request():
+            return
+
+        handler = PersistentServerHandler(
+            self.rfile, self.wfile, self.get_stderr(), self.get_environ()
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+
+class PooledWSGIServer(WSGIServer):
+    """
+    WSGI server with a fixed pool of worker threads.
+
+    The accept loop only pushes sockets into a bounded queue. When the queue
+    stays full for `queue_timeout` seconds the connection is answered with a
+    503 instead of growing the backlog without limit.
+    """
+    request_queue_size = 64
+
+    def __init__(self, server_address, RequestHandlerClass=PersistentWSGIRequestHandler,
+                 workers=8, queue_size=32, queue_timeout=2.0, keepalive_timeout=5.0,
+                 bind_and_activate=True):
+        super().__init__(server_address, RequestHandlerClass, bind_and_activate)
+        self.keepalive_timeout = keepalive_timeout
+        self.queue_timeout = queue_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        self._workers = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker_loop, name=f"wsgi-worker-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def is_saturated(self):
+        """True when accepted connections are waiting for a free worker."""
+        return not self._queue.empty()
+
+    def get_request(self):
+        request, client_address = super().get_request()
+        # Headers and body go out as separate writes; don't let Nagle hold the body back
+        request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return request, client_address
+
+    def process_request(self, request, client_address):
+        try:
+            self._queue.put((request, client_address), timeout=self.queue_timeout)
+        except queue.Full:
+            logger.warning(f"Server busy, rejecting {client_address[0]}")
+            self._reject(request)
+
+    def _reject(self, request):
+        try:
+            request.sendall(
+                b"HTTP/1.1 503 Service Unavailable\r\n"
+                b"Content-Length: 0\r\nRetry-After: 1\r\nConnection: close\r\n\r\n"
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _worker_loop(self):
+        while True:
+            try:
+                # Once stopping, drain what is queued and exit instead of waiting
+                item = self._queue.get_nowait() if self._stopping.is_set() else self._queue.get()
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        logger.error(f"Request from {client_address[0]} failed", exc_info=True)
+
+    def server_close(self):
+        super().server_close()
+        self._stopping.set()
+        # Wake idle workers; a full queue has no idle workers and must not block us
+        for _ in self._workers:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    def close_gracefully(self, timeout=5.0):
+        """Stop accepting, let queued and in-flight requests finish, join workers."""
+        self.shutdown()
+        self.server_close()
+        for t in self._workers:
+            t.join(timeout)
+        alive = [t.name for t in self._workers if t.is_alive()]
+        if alive:
+            logger.warning(f"Server shutdown timed out waiting for {alive}")
+
+
+# --- 3. BACKEND REGISTRY ---
+SERVER_BACKENDS = {
+    "pooled": lambda address: PooledWSGIServer(address),
+    "threaded": lambda address: ThreadedWSGIServer(address, WSGIRequestHandler),
+}
+
+DEFAULT_BACKEND = "pooled"
+
+
+def make_server(app, address=("127.0.0.1", 0), backend=DEFAULT_BACKEND):
+    """Build the named server backend and attach the WSGI app to it."""
+    if backend not in SERVER_BACKENDS:
+        logger.warning(f"Unknown server backend '{backend}', using '{DEFAULT_BACKEND}'")
+        backend = DEFAULT_BACKEND
+    httpd = SERVER_BACKENDS[backend](address)
+    httpd.set_app(app)
+    return httpd
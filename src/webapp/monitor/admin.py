@@ -1,5 +1,19 @@
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
 from .models import DailyEntry, Habit, HabitLog, CalendarTask, TodoTask, Quote, Plan, Branch
+from . import search
+
+
+class FullTextSearchMixin:
+    """Admin search through the FTS index of `search_kind` instead of LIKE '%...%' scans."""
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        expression = search.match_expression(search_term)
+        if expression is None:
+            return queryset, False
+        ids = RawSQL(search.matching_ids_sql(self.search_kind), [expression])
+        return queryset.filter(pk__in=ids), False
 
 # Registering the new Dynamic Models
 
@@ -15,8 +29,9 @@ class HabitLogInline(admin.TabularInline):
     extra = 0
 
 @admin.register(DailyEntry)
-class DailyEntryAdmin(admin.ModelAdmin):
+class DailyEntryAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['date', 'loved_someone', 'created_at']
+    search_kind = 'entry'
     search_fields = ['daily_summary', 'loved_someone']
     inlines = [HabitLogInline]
 
@@ -34,14 +49,19 @@ class TodoTaskAdmin(admin.ModelAdmin):
     search_fields = ['task_name']
 
 @admin.register(Quote)
-class QuoteAdmin(admin.ModelAdmin):
+class QuoteAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['text']
+    search_kind = 'quote'
     search_fields = ['text']
 
 @admin.register(Plan)
-class PlanAdmin(admin.ModelAdmin):
+class PlanAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['title', 'created_at']
+    search_kind = 'plan'
+    search_fields = ['title', 'description']
 
 @admin.register(Branch)
-class BranchAdmin(admin.ModelAdmin):
-    list_display = ['name', 'plan', 'created_at']
\ No newline at end of file
+class BranchAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ['name', 'plan', 'created_at']
+    search_kind = 'branch'
+    search_fields = ['name', 'notes']
\ No newline at end of file
@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class MonitorConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "monitor"
+
+    def ready(self):
+        from . import signals  # noqa: F401  (DailyScore maintenance)
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+        from user_monitoring.db_profile import apply_sqlite_profile, close_stale_connections
+        from user_monitoring.db_registry import database_switched
+        from user_monitoring.middleware import presence
+        from user_monitoring.response_cache import cache
+
+        connection_created.connect(apply_sqlite_profile, dispatch_uid="sqlite_profile")
+        request_started.connect(close_stale_connections, dispatch_uid="close_stale_connections")
+
+        # Connecting creates a missing SQLite file; a switch changes which file matters
+        connection_created.connect(presence.invalidate, dispatch_uid="db_presence_created")
+        database_switched.connect(presence.invalidate, dispatch_uid="db_presence_switched")
+
+        database_switched.connect(cache.on_database_switched, dispatch_uid="response_cache_switched")
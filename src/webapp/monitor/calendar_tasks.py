@@ -0,0 +1,183 @@
+"""
+Filtering, keyset pagination and conditional GETs for CalendarTaskViewSet.
+
+A month view transfers only that month's rows, read through the
+(date, task_type, priority) index; the grid itself only needs
+month_summary(), one GROUP BY over that index, and task details are loaded
+per day when one is tapped (load_tasks). The consolidated list is paged by
+(date, id) keyset cursors, so a page costs the same at any depth. Lists
+carry an ETag built from the table's TableVersion, which triggers bump on
+every write, so an unchanged month is answered with a 304 without reading
+any task.
+"""
+import base64
+import calendar
+from datetime import date, datetime
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import CalendarTask, DataStamp, TableVersion
+
+MAX_SUMMARY_MONTHS = 12
+
+
+def _date(params, name):
+    try:
+        return datetime.strptime(params[name], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValidationError({name: 'Expected YYYY-MM-DD.'})
+
+
+def month_range(year, month):
+    """First and last day of a month."""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def filter_tasks(queryset, params):
+    """
+    Tasks matching ?date=, ?start=/?end=, ?month=&year=, and ?task_type= /
+    ?priority= (repeatable), ordered by (date, id). Raises ValidationError
+    (a 400) for malformed values.
+    """
+    if params.get('date'):
+        queryset = queryset.filter(date=_date(params, 'date'))
+    if params.get('start'):
+        queryset = queryset.filter(date__gte=_date(params, 'start'))
+    if params.get('end'):
+        queryset = queryset.filter(date__lte=_date(params, 'end'))
+    if params.get('month') or params.get('year'):
+        try:
+            first, last = month_range(int(params['year']), int(params['month']))
+        except (KeyError, ValueError, OverflowError):
+            raise ValidationError({'month': 'month and year must be given together, as numbers.'})
+        queryset = queryset.filter(date__range=(first, last))
+    for field in ('task_type', 'priority'):
+        values = params.getlist(field)
+        if values:
+            queryset = queryset.filter(**{f'{field}__in': values})
+    return queryset.order_by('date', 'id')
+
+
+def month_window(year, month, months=1):
+    """First day of (year, month) and last day of the `months`-th month from it."""
+    first, _ = month_range(year, month)
+    end_year, end_month = divmod(year * 12 + month - 1 + months - 1, 12)
+    return first, month_range(end_year, end_month + 1)[1]
+
+
+def month_summary(start, end, using=DEFAULT_DB_ALIAS):
+    """
+    Task counts per day in [start, end]:
+    {'YYYY-MM-DD': {'total': n, 'task_type': {type: n}, 'priority': {priority: n}}}
+    for days with tasks only. One GROUP BY, answered from the index alone.
+    """
+    rows = (
+        CalendarTask.objects.using(using)
+        .filter(date__range=(start, end))
+        .values_list('date', 'task_type', 'priority')
+        .annotate(n=Count('id'))
+        .order_by('date', 'task_type', 'priority')
+    )
+    days = {}
+    for day, task_type, priority, n in rows:
+        counts = days.setdefault(day.isoformat(), {'total': 0, 'task_type': {}, 'priority': {}})
+        counts['total'] += n
+        counts['task_type'][task_type] = counts['task_type'].get(task_type, 0) + n
+        counts['priority'][priority] = counts['priority'].get(priority, 0) + n
+    return days
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pages of (date, id)-ordered rows after an opaque cursor. Only used when
+    the client asks for it with ?page_size= or ?cursor=; other lists are
+    returned whole, as before.
+    """
+    default_page_size = 50
+    max_page_size = 200
+
+    def parse_params(self, params):
+        """(page_size, cursor position or None), or None when not paging. Raises ValidationError."""
+        if 'page_size' not in params and 'cursor' not in params:
+            return None
+        try:
+            page_size = min(max(int(params.get('page_size', self.default_page_size)), 1), self.max_page_size)
+        except ValueError:
+            raise ValidationError({'page_size': 'Expected a number.'})
+        return page_size, self.decode_cursor(params['cursor']) if params.get('cursor') else None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        parsed = self.parse_params(request.query_params)
+        if parsed is None:
+            return None
+        self.page_size, after = parsed
+        if after is not None:
+            after_date, after_id = after
+            queryset = queryset.filter(Q(date__gt=after_date) | Q(date=after_date, id__gt=after_id))
+        rows = list(queryset[:self.page_size + 1])
+        self.request = request
+        self.page = rows[:self.page_size]
+        self.has_next = len(rows) > self.page_size
+        return self.page
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.has_next:
+            last = self.page[-1]
+            next_url = replace_query_param(self.request.build_absolute_uri(), 'cursor', self.encode_cursor(last))
+        return Response({'next': next_url, 'results': data})
+
+    @staticmethod
+    def encode_cursor(task):
+        return base64.urlsafe_b64encode(f"{task.date.isoformat()}:{task.id}".encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            day, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+            return date.fromisoformat(day), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+
+
+def table_etag(model):
+    """ETag for the current contents of `model`'s table in this database file, or None."""
+    stamp = DataStamp.objects.order_by('pk').values_list('file_id', flat=True).first()
+    version = TableVersion.objects.filter(table=model._meta.db_table).values_list('version', flat=True).first()
+    if stamp is None or version is None:
+        return None
+    return quote_etag(f"{model._meta.db_table}.{stamp}.{version}")
+
+
+def table_conditional(model, request, respond):
+    """respond(), or a 304 when the client's If-None-Match still matches `model`'s table."""
+    etag = table_etag(model)
+    if etag is not None:
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+    response = respond()
+    if etag is not None and response.status_code == 200:
+        response['ETag'] = etag
+        # Keep a copy in the WebView but revalidate it every time
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalListMixin:
+    """list() answers If-None-Match with a 304 while the table is unchanged."""
+
+    def list(self, request, *args, **kwargs):
+        # Malformed filters and cursors are a 400 even when the ETag matches
+        self.get_queryset()
+        if isinstance(self.paginator, KeysetPagination):
+            self.paginator.parse_params(request.query_params)
+        parent = super().list
+        return table_conditional(self.queryset.model, request, lambda: parent(request, *args, **kwargs))
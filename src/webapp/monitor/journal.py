@@ -0,0 +1,45 @@
+"""
+The daily review write path.
+
+A day is saved in one transaction of two writes, however often it is
+re-saved: an INSERT ... ON CONFLICT(date) DO UPDATE for the entry and one
+for all of its habit logs (unique on entry, habit since migration 0008),
+with the entry's id read back in between. Rows are updated in place, so
+re-saving never adds rows.
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from . import signals
+from .models import DailyEntry, HabitLog, normalize_name
+
+
+def save_day(day, habits, completed, loved_someone='', daily_summary='', using=DEFAULT_DB_ALIAS):
+    """
+    Create or overwrite the entry for `day` and the log of every habit in
+    `habits` (done if its id is in `completed`). Logs of other habits, e.g.
+    ones deactivated since, are left as they are. Returns the entry's id.
+    """
+    entry = DailyEntry(
+        date=day,
+        loved_someone=loved_someone,
+        loved_key=normalize_name(loved_someone),
+        daily_summary=daily_summary,
+    )
+    with transaction.atomic(using=using):
+        DailyEntry.objects.using(using).bulk_create(
+            [entry],
+            update_conflicts=True,
+            unique_fields=['date'],
+            update_fields=['loved_someone', 'loved_key', 'daily_summary'],
+        )
+        # Django < 5.0 leaves pk unset after an upsert on SQLite: read it back
+        entry_id = DailyEntry.objects.using(using).values_list('pk', flat=True).get(date=day)
+        HabitLog.objects.using(using).bulk_create(
+            [HabitLog(entry_id=entry_id, habit_id=habit.pk, completed=habit.pk in completed) for habit in habits],
+            update_conflicts=True,
+            unique_fields=['entry', 'habit'],
+            update_fields=['completed'],
+        )
+        # bulk_create sends no post_save: refresh the day's score ourselves
+        signals.schedule_refresh(day, using)
+    return entry_id
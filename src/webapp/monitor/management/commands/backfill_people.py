@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from monitor.people import backfill_loved_keys
+
+
+class Command(BaseCommand):
+    help = "Recompute the normalized people index (DailyEntry.loved_key) where it is out of date."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        fixed = backfill_loved_keys(options["database"])
+        self.stdout.write(self.style.SUCCESS(f"Updated {fixed} entries."))
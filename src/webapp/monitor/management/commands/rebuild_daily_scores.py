@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from monitor.scoring import daily_scores, materialized_scores, rebuild_daily_scores
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyScore table from HabitLog/DailyEntry/Habit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Only compare the table with a full recompute; exit non-zero on mismatch.",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        if options["verify"]:
+            expected = daily_scores(using=using)
+            actual = materialized_scores(using=using)
+            if expected != actual:
+                mismatched = sum(1 for a, b in zip(expected, actual) if a != b) + abs(len(expected) - len(actual))
+                self.stderr.write(self.style.ERROR(f"DailyScore is stale: {mismatched} rows differ."))
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS(f"DailyScore matches ({len(actual)} days)."))
+            return
+        count = rebuild_daily_scores(using)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt DailyScore ({count} days)."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from monitor import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of journal entries, quotes, plans and branches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Only check the index against the source tables; exit non-zero on mismatch.",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        if options["verify"]:
+            stale = search.verify(using)
+            if stale:
+                self.stderr.write(self.style.ERROR(f"Search index is stale for: {', '.join(stale)}."))
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS("Search index matches."))
+            return
+        search.rebuild(using)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the search index ({len(search.SOURCES)} sources)."))
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:54
+
+from django.db import migrations, models
+
+# Frozen copy of monitor.scoring's aggregate, so old databases start populated
+POPULATE_SQL = """
+INSERT INTO monitor_dailyscore (date, day_score, cumulative_score, completed_count)
+SELECT e.date,
+       COALESCE(SUM(CASE WHEN l.completed THEN h.positive_score + h.negative_score END), 0),
+       SUM(COALESCE(SUM(CASE WHEN l.completed THEN h.positive_score + h.negative_score END), 0))
+           OVER (ORDER BY e.date ROWS UNBOUNDED PRECEDING),
+       COUNT(CASE WHEN l.completed THEN 1 END)
+FROM monitor_dailyentry e
+LEFT JOIN monitor_habitlog l ON l.entry_id = e.id
+LEFT JOIN monitor_habit h ON h.id = l.habit_id
+GROUP BY e.date
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitor", "0003_alter_quote_options_quote_order"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("day_score", models.IntegerField(default=0)),
+                ("cumulative_score", models.IntegerField(default=0)),
+                ("completed_count", models.IntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["date"],
+            },
+        ),
+        migrations.RunSQL(POPULATE_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+# Tables whose rows the cached analytics pages are built from
+STAMPED_TABLES = [
+    "monitor_habit",
+    "monitor_habitlog",
+    "monitor_dailyentry",
+    "monitor_dailyscore",
+    "monitor_calendartask",
+]
+
+CREATE_STAMP = """
+INSERT INTO monitor_datastamp (file_id, version) VALUES (lower(hex(randomblob(8))), 0)
+"""
+
+TRIGGERS = [f"""
+    CREATE TRIGGER {table}_stamp_{event.lower()} AFTER {event} ON {table}
+    BEGIN
+        UPDATE monitor_datastamp SET version = version + 1;
+    END
+    """ for table in STAMPED_TABLES for event in ("INSERT", "UPDATE", "DELETE")]
+
+DROP_TRIGGERS = [
+    f"DROP TRIGGER IF EXISTS {table}_stamp_{event.lower()}"
+    for table in STAMPED_TABLES
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitor", "0004_dailyscore"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataStamp",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file_id", models.CharField(max_length=32)),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(CREATE_STAMP, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(TRIGGERS, reverse_sql=DROP_TRIGGERS),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:10
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+datastamp = import_module("monitor.migrations.0005_datastamp")
+
+# Adding a column with a default makes SQLite rebuild monitor_dailyentry, which
+# drops its DataStamp triggers, so reinstall 0005's triggers afterwards.
+REINSTALL_TRIGGERS = datastamp.DROP_TRIGGERS + datastamp.TRIGGERS
+
+
+def backfill_loved_keys(apps, schema_editor):
+    # Frozen copy of monitor.models.normalize_name
+    DailyEntry = apps.get_model("monitor", "DailyEntry")
+    entries = DailyEntry.objects.using(schema_editor.connection.alias)
+    updated = [
+        DailyEntry(id=pk, loved_key=" ".join(name.split()).casefold())
+        for pk, name in entries.exclude(loved_someone="").values_list(
+            "id", "loved_someone"
+        )
+    ]
+    entries.bulk_update(updated, ["loved_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitor", "0005_datastamp"),
+    ]
+
+    operations = [
+        # Reversed last, after RemoveField has rebuilt the table again
+        migrations.RunSQL(migrations.RunSQL.noop, reverse_sql=REINSTALL_TRIGGERS),
+        migrations.AddField(
+            model_name="dailyentry",
+            name="loved_key",
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name="dailyentry",
+            index=models.Index(
+                fields=["date", "loved_key"], name="monitor_entry_date_loved"
+            ),
+        ),
+        migrations.RunPython(backfill_loved_keys, migrations.RunPython.noop),
+        migrations.RunSQL(REINSTALL_TRIGGERS, reverse_sql=migrations.RunSQL.noop),
+    ]
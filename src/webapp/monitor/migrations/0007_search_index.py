@@ -0,0 +1,61 @@
+# Full-text search over journal summaries, quotes and plan notes (monitor/search.py)
+
+from django.db import migrations
+
+# fts table -> (content table, indexed columns)
+INDEXED = {
+    "monitor_dailyentry_fts": (
+        "monitor_dailyentry",
+        ["daily_summary", "loved_someone"],
+    ),
+    "monitor_quote_fts": ("monitor_quote", ["text"]),
+    "monitor_plan_fts": ("monitor_plan", ["title", "description"]),
+    "monitor_branch_fts": ("monitor_branch", ["name", "notes"]),
+}
+
+
+def _forward(fts, table, columns):
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return [
+        # External content: the text lives once, in the model's table
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        f"""
+        CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {fts}_update AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});
+        END
+        """,
+    ]
+
+
+def _backward(fts):
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_{event}"
+        for event in ("insert", "delete", "update")
+    ] + [f"DROP TABLE IF EXISTS {fts}"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitor", "0006_dailyentry_loved_key"),
+    ]
+
+    operations = [
+        migrations.RunSQL(_forward(fts, table, columns), reverse_sql=_backward(fts))
+        for fts, (table, columns) in INDEXED.items()
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:15
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+scores = import_module("monitor.migrations.0004_dailyscore")
+
+# Existing databases may hold several entries for one day (input_view used to
+# insert on every submission). Keep the latest entry per day, filling its blank
+# text from the latest earlier one, move every log onto it and keep the latest
+# log per habit, then recompute DailyScore.
+_KEPT = "SELECT MAX(id) FROM monitor_dailyentry GROUP BY date"
+_LATEST = """
+    COALESCE((SELECT d.{column} FROM monitor_dailyentry d
+              WHERE d.date = monitor_dailyentry.date AND d.{source} != ''
+              ORDER BY d.id DESC LIMIT 1), '')
+"""
+DEDUP_SQL = [
+    f"""
+    UPDATE monitor_dailyentry
+    SET daily_summary = {_LATEST.format(column="daily_summary", source="daily_summary")}
+    WHERE daily_summary = '' AND id IN ({_KEPT} HAVING COUNT(*) > 1)
+    """,
+    f"""
+    UPDATE monitor_dailyentry
+    SET loved_someone = {_LATEST.format(column="loved_someone", source="loved_someone")},
+        loved_key = {_LATEST.format(column="loved_key", source="loved_someone")}
+    WHERE loved_someone = '' AND id IN ({_KEPT} HAVING COUNT(*) > 1)
+    """,
+    f"""
+    UPDATE monitor_habitlog
+    SET entry_id = (
+        SELECT MAX(k.id) FROM monitor_dailyentry k
+        WHERE k.date = (SELECT date FROM monitor_dailyentry WHERE id = monitor_habitlog.entry_id)
+    )
+    WHERE entry_id NOT IN ({_KEPT})
+    """,
+    "DELETE FROM monitor_habitlog WHERE id NOT IN (SELECT MAX(id) FROM monitor_habitlog GROUP BY entry_id, habit_id)",
+    f"DELETE FROM monitor_dailyentry WHERE id NOT IN ({_KEPT})",
+    "DELETE FROM monitor_dailyscore",
+    scores.POPULATE_SQL,
+]
+
+# Adding a unique constraint makes SQLite rebuild monitor_dailyentry and
+# monitor_habitlog, which drops their triggers: 0005's DataStamp triggers on
+# both and 0007's search index triggers on monitor_dailyentry. Frozen copies.
+_STAMP_EVENTS = ("INSERT", "UPDATE", "DELETE")
+_FTS_COLUMNS = "daily_summary, loved_someone"
+_FTS_NEW = "new.daily_summary, new.loved_someone"
+_FTS_OLD = "old.daily_summary, old.loved_someone"
+REINSTALL_TRIGGERS = (
+    [
+        f"DROP TRIGGER IF EXISTS {table}_stamp_{event.lower()}"
+        for table in ("monitor_dailyentry", "monitor_habitlog")
+        for event in _STAMP_EVENTS
+    ]
+    + [
+        f"""
+    CREATE TRIGGER {table}_stamp_{event.lower()} AFTER {event} ON {table}
+    BEGIN
+        UPDATE monitor_datastamp SET version = version + 1;
+    END
+    """
+        for table in ("monitor_dailyentry", "monitor_habitlog")
+        for event in _STAMP_EVENTS
+    ]
+    + [
+        f"DROP TRIGGER IF EXISTS monitor_dailyentry_fts_{event}"
+        for event in ("insert", "delete", "update")
+    ]
+    + [
+        f"""
+    CREATE TRIGGER monitor_dailyentry_fts_insert AFTER INSERT ON monitor_dailyentry BEGIN
+        INSERT INTO monitor_dailyentry_fts(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+    END
+    """,
+        f"""
+    CREATE TRIGGER monitor_dailyentry_fts_delete AFTER DELETE ON monitor_dailyentry BEGIN
+        INSERT INTO monitor_dailyentry_fts(monitor_dailyentry_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, {_FTS_OLD});
+    END
+    """,
+        f"""
+    CREATE TRIGGER monitor_dailyentry_fts_update AFTER UPDATE OF {_FTS_COLUMNS} ON monitor_dailyentry BEGIN
+        INSERT INTO monitor_dailyentry_fts(monitor_dailyentry_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, {_FTS_OLD});
+        INSERT INTO monitor_dailyentry_fts(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+    END
+    """,
+    ]
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitor", "0007_search_index"),
+    ]
+
+    operations = [
+        # Reversed last, after RemoveConstraint has rebuilt the tables again
+        migrations.RunSQL(migrations.RunSQL.noop, reverse_sql=REINSTALL_TRIGGERS),
+        migrations.RunSQL(DEDUP_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="calendartask",
+            index=models.Index(
+                fields=["date", "task_type", "priority"], name="monitor_task_date_type"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dailyentry",
+            constraint=models.UniqueConstraint(
+                fields=("date",), name="monitor_entry_unique_date"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="habitlog",
+            constraint=models.UniqueConstraint(
+                fields=("entry", "habit"), name="monitor_log_unique_entry_habit"
+            ),
+        ),
+        migrations.RunSQL(REINSTALL_TRIGGERS, reverse_sql=migrations.RunSQL.noop),
+    ]
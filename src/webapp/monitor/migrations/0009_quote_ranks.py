@@ -0,0 +1,29 @@
+# Sparse quote ranks (monitor/ranking.py)
+
+from django.db import migrations, models
+
+# Frozen copy of ranking.GAP; respaces the existing 0..n-1 (or duplicate) orders
+RESPACE_SQL = """
+UPDATE monitor_quote
+SET "order" = 1024 * (
+    SELECT position FROM (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY "order", id) AS position FROM monitor_quote
+    ) ranked
+    WHERE ranked.id = monitor_quote.id
+)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitor", "0008_entry_log_constraints"),
+    ]
+
+    operations = [
+        migrations.RunSQL(RESPACE_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="quote",
+            index=models.Index(fields=["order"], name="monitor_quote_order"),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+# Tables whose list APIs answer conditional GETs from their version
+VERSIONED_TABLES = ["monitor_calendartask"]
+
+CREATE_ROWS = [
+    f"""INSERT INTO monitor_tableversion ("table", version) VALUES ('{table}', 0)"""
+    for table in VERSIONED_TABLES
+]
+
+TRIGGERS = [f"""
+    CREATE TRIGGER {table}_version_{event.lower()} AFTER {event} ON {table}
+    BEGIN
+        UPDATE monitor_tableversion SET version = version + 1 WHERE "table" = '{table}';
+    END
+    """ for table in VERSIONED_TABLES for event in ("INSERT", "UPDATE", "DELETE")]
+
+DROP_TRIGGERS = [
+    f"DROP TRIGGER IF EXISTS {table}_version_{event.lower()}"
+    for table in VERSIONED_TABLES
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitor", "0009_quote_ranks"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("table", models.CharField(max_length=100, unique=True)),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(CREATE_ROWS, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(TRIGGERS, reverse_sql=DROP_TRIGGERS),
+    ]
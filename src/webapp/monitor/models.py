@@ -25,6 +25,10 @@ class Habit(models.Model):
     class Meta:
         ordering = ['order', 'name']
 
+def normalize_name(name):
+    """People index key: case-folded, with surrounding and repeated whitespace removed."""
+    return " ".join((name or "").split()).casefold()
+
 class DailyEntry(models.Model):
     """
     Replaces the old UserInput model.
@@ -32,14 +36,31 @@ class DailyEntry(models.Model):
     """
     date = models.DateField()
     loved_someone = models.CharField(max_length=100, blank=True, help_text="Name of someone you loved today.")
+    # normalize_name(loved_someone), set on save; rows written around save() are fixed by `manage.py backfill_people`
+    loved_key = models.CharField(max_length=100, blank=True, editable=False)
     daily_summary = models.TextField(blank=True, help_text="A short summary of your day.")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        self.loved_key = normalize_name(self.loved_someone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'loved_someone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'loved_key'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Entry for {self.date}"
     
     class Meta:
         ordering = ['-date']
+        constraints = [
+            # One entry per day; input_view updates it on resubmission
+            models.UniqueConstraint(fields=['date'], name='monitor_entry_unique_date'),
+        ]
+        indexes = [
+            # Top-N people over a date range: range scan on date, covering the key
+            models.Index(fields=['date', 'loved_key'], name='monitor_entry_date_loved'),
+        ]
 
 class HabitLog(models.Model):
     """
@@ -53,13 +74,60 @@ class HabitLog(models.Model):
         status = "Done" if self.completed else "Not Done"
         return f"{self.habit.name} - {self.entry.date}: {status}"
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['entry', 'habit'], name='monitor_log_unique_entry_habit'),
+        ]
+
+class DailyScore(models.Model):
+    """
+    Materialized Life Score per day, kept in sync by monitor/signals.py.
+    Rebuild with `manage.py rebuild_daily_scores`.
+    """
+    date = models.DateField(unique=True)
+    day_score = models.IntegerField(default=0)
+    cumulative_score = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Score for {self.date}: {self.day_score} ({self.cumulative_score})"
+
+    class Meta:
+        ordering = ['date']
+
+class DataStamp(models.Model):
+    """
+    Single row identifying this database file's contents: a random file id
+    set at creation and a change counter that SQLite triggers (migration
+    0005) bump on every write to the tables the analytics pages read.
+    Persistent cache keys are built from it (user_monitoring/response_cache.py).
+    """
+    file_id = models.CharField(max_length=32)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.file_id}.{self.version}"
+
+class TableVersion(models.Model):
+    """
+    Change counter of a single table, bumped by SQLite triggers (migration
+    0010) on every write to it. List APIs derive their ETag from it, so a
+    conditional GET is answered without reading the table
+    (monitor/calendar_tasks.py).
+    """
+    table = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.table}: {self.version}"
+
 # --- Existing Models ---
 
 class Quote(models.Model):
     text = models.TextField(max_length=3000)
     # Field to track the "sense" tick state (Green color)
     is_sensed = models.BooleanField(default=False) 
-    # Field for manual ordering
+    # Sparse manual rank, GAP apart (see monitor/ranking.py)
     order = models.IntegerField(default=0)
 
     def __str__(self):
@@ -67,6 +135,9 @@ class Quote(models.Model):
     
     class Meta:
         ordering = ['order'] # Default ordering by the new order field
+        indexes = [
+            models.Index(fields=['order'], name='monitor_quote_order'),
+        ]
 
 class CalendarTask(models.Model):
     date = models.DateField()
@@ -87,6 +158,12 @@ class CalendarTask(models.Model):
     def __str__(self):
         return f"{self.name}: {self.date}"
 
+    class Meta:
+        indexes = [
+            # Day and month lookups, covering the type/priority the calendar groups by
+            models.Index(fields=['date', 'task_type', 'priority'], name='monitor_task_date_type'),
+        ]
+
 class TodoTask(models.Model):
     task_name = models.CharField(max_length=255)
     def __str__(self):
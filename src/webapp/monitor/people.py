@@ -0,0 +1,36 @@
+"""
+"Social Graph": who was loved, and how often, over any date range.
+
+DailyEntry.loved_key holds the normalized name (models.normalize_name), so
+counting is one GROUP BY served by the (date, loved_key) index instead of
+normalizing every loved_someone in Python.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count
+
+from .models import DailyEntry, normalize_name
+
+
+def top_people(start=None, end=None, limit=None, using=DEFAULT_DB_ALIAS):
+    """[(display name, days), ...], most frequent first (ties by name); the first `limit` unless None."""
+    qs = DailyEntry.objects.using(using).exclude(loved_key='')
+    if start is not None:
+        qs = qs.filter(date__gte=start)
+    if end is not None:
+        qs = qs.filter(date__lte=end)
+    rows = qs.values('loved_key').annotate(days=Count('id')).order_by('-days', 'loved_key')
+    if limit is not None:
+        rows = rows[:limit]
+    return [(row['loved_key'].title(), row['days']) for row in rows]
+
+
+def backfill_loved_keys(using=DEFAULT_DB_ALIAS, batch_size=500):
+    """Recompute loved_key where it is stale (rows written around save()). Returns the number fixed."""
+    entries = DailyEntry.objects.using(using)
+    stale = [
+        DailyEntry(id=pk, loved_key=normalize_name(name))
+        for pk, name, key in entries.values_list('id', 'loved_someone', 'loved_key')
+        if normalize_name(name) != key
+    ]
+    entries.bulk_update(stale, ['loved_key'], batch_size=batch_size)
+    return len(stale)
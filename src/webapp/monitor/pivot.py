@@ -0,0 +1,52 @@
+"""
+Entry x habit completion matrix.
+
+One query over DailyEntry with a conditional MAX per habit (SQLite folds
+them into a single GROUP BY pass over the range's HabitLog rows), instead of
+one HabitLog lookup per cell.
+"""
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Case, IntegerField, Max, Q, When
+
+from .models import DailyEntry
+
+MatrixRow = namedtuple("MatrixRow", "date flags")
+
+
+def matrix_query(habits, start=None, end=None, fields=(), using=DEFAULT_DB_ALIAS):
+    """
+    values_list of (date, *fields, one 0/1 column per habit) per entry in
+    [start, end] (either bound optional), oldest first.
+    """
+    qs = DailyEntry.objects.using(using).order_by('date', 'id')
+    if start is not None:
+        qs = qs.filter(date__gte=start)
+    if end is not None:
+        qs = qs.filter(date__lte=end)
+    columns = {
+        f'h{habit.pk}': Max(Case(
+            When(Q(habit_logs__habit_id=habit.pk, habit_logs__completed=True), then=1),
+            default=0,
+            output_field=IntegerField(),
+        ))
+        for habit in habits
+    }
+    return qs.annotate(**columns).values_list('date', *fields, *columns)
+
+
+def habit_matrix(habits, start=None, end=None, using=DEFAULT_DB_ALIAS):
+    """One MatrixRow per entry; flags[i] is 1 if habits[i] was completed that day, else 0."""
+    return [MatrixRow(row[0], list(row[1:])) for row in matrix_query(habits, start, end, using=using)]
+
+
+def matrix_records(habits, matrix):
+    """The rows view_data.html charts: {'date': 'YYYY-MM-DD', <habit name>: 0/1, ...}."""
+    names = [habit.name for habit in habits]
+    records = []
+    for row in matrix:
+        record = {'date': row.date.strftime('%Y-%m-%d')}
+        record.update(zip(names, row.flags))
+        records.append(record)
+    return records
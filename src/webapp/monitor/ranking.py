@@ -0,0 +1,86 @@
+"""
+Sparse integer ranks for manually ordered rows (Quote.order).
+
+Ranks are spaced GAP apart, so moving a row between two neighbours writes
+one row: it takes the midpoint of their ranks. When two neighbours end up
+adjacent there is no integer left between them and the whole list is
+respaced with a single CASE UPDATE (the same statement as a bulk reorder).
+New rows go GAP after the last rank, found through the index on `order`.
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Case, Value, When
+
+GAP = 1024
+
+
+class StaleOrder(ValueError):
+    """The client's neighbours are not neighbours any more (or do not exist)."""
+
+
+def next_rank(model, using=DEFAULT_DB_ALIAS):
+    """Rank that puts a new row last."""
+    last = model.objects.using(using).order_by('-order').values_list('order', flat=True).first()
+    return GAP if last is None else last + GAP
+
+
+def reorder(model, ids, using=DEFAULT_DB_ALIAS):
+    """Rank rows in the order of `ids`, GAP apart, with one UPDATE. Returns the rows updated."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    with transaction.atomic(using=using):
+        return model.objects.using(using).filter(pk__in=ids).update(order=Case(
+            *[When(pk=pk, then=Value(position * GAP)) for position, pk in enumerate(ids, 1)],
+            default='order',
+        ))
+
+
+def rebalance(model, using=DEFAULT_DB_ALIAS):
+    """Respace every row GAP apart, keeping the current order."""
+    return reorder(model, model.objects.using(using).order_by('order', 'pk').values_list('pk', flat=True), using)
+
+
+def move(model, pk, before=None, after=None, using=DEFAULT_DB_ALIAS):
+    """
+    Put row `pk` right after row `before` and right before row `after`.
+    With one neighbour the other side is the row now adjacent to it, read
+    through the index on `order` (none: at the top / at the end). Writes one
+    row unless the neighbours' ranks are adjacent, which triggers a
+    rebalance first. Returns the new rank; raises model.DoesNotExist for an
+    unknown row and StaleOrder when `before` does not rank below `after`.
+    """
+    if pk in (before, after):
+        raise StaleOrder("A row cannot be its own neighbour")
+    rows = model.objects.using(using)
+    others = rows.exclude(pk=pk)
+    with transaction.atomic(using=using):
+        rows.get(pk=pk)
+        for attempt in range(2):
+            ranks = dict(rows.filter(pk__in=[p for p in (before, after) if p is not None]).values_list('pk', 'order'))
+            low, high = ranks.get(before), ranks.get(after)
+            if (before is not None and low is None) or (after is not None and high is None):
+                raise StaleOrder("Neighbour not found")
+            if low is not None and high is not None and low >= high:
+                raise StaleOrder("Neighbours are out of order")
+
+            # One neighbour given: the other is whichever row is adjacent to it now
+            if low is None and high is not None:
+                low = others.filter(order__lt=high).order_by('-order').values_list('order', flat=True).first()
+            elif high is None and low is not None:
+                high = others.filter(order__gt=low).order_by('order').values_list('order', flat=True).first()
+
+            if low is None and high is None:
+                rank = next_rank(model, using)
+            elif low is None:
+                rank = high - GAP
+            elif high is None:
+                rank = low + GAP
+            elif high - low >= 2:
+                rank = (low + high) // 2
+            elif attempt == 0:
+                rebalance(model, using)
+                continue
+            else:
+                raise StaleOrder("Neighbours are not adjacent")
+            rows.filter(pk=pk).update(order=rank)
+            return rank
@@ -0,0 +1,157 @@
+"""
+Life Score engine.
+
+The per-day score (sum of positive_score + negative_score of the habits
+completed that day) and its running total are computed by SQLite in one
+GROUP BY + window SUM query; per-habit impact is one annotated query.
+
+The result is materialized in DailyScore, which monitor/signals.py keeps
+up to date one day at a time, so charts read O(days) precomputed rows.
+"""
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .downsample import lttb
+from .models import DailyEntry, DailyScore, Habit, HabitLog
+
+DayScore = namedtuple("DayScore", "date day_score cumulative completed")
+
+# Points sent to the line chart unless ?max_points= says otherwise (0 = all)
+DEFAULT_MAX_POINTS = 400
+
+_DAILY_SCORES_SQL = """
+SELECT date, day_score, cumulative, completed FROM (
+    SELECT e.date AS date,
+           COALESCE(SUM(CASE WHEN l.completed THEN h.positive_score + h.negative_score END), 0) AS day_score,
+           SUM(COALESCE(SUM(CASE WHEN l.completed THEN h.positive_score + h.negative_score END), 0))
+               OVER (ORDER BY e.date ROWS UNBOUNDED PRECEDING) AS cumulative,
+           COUNT(CASE WHEN l.completed THEN 1 END) AS completed
+    FROM {entry} e
+    LEFT JOIN {log} l ON l.entry_id = e.id
+    LEFT JOIN {habit} h ON h.id = l.habit_id
+    GROUP BY e.date
+)
+{where}
+ORDER BY date
+"""
+
+
+def daily_scores(start=None, end=None, using=DEFAULT_DB_ALIAS):
+    """
+    One DayScore per date with entries, oldest first. The cumulative total
+    always counts from the first entry, also when start/end narrow the window.
+    """
+    connection = connections[using]
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("date >= %s")
+        params.append(connection.ops.adapt_datefield_value(start))
+    if end is not None:
+        conditions.append("date <= %s")
+        params.append(connection.ops.adapt_datefield_value(end))
+    sql = _DAILY_SCORES_SQL.format(
+        entry=DailyEntry._meta.db_table,
+        log=HabitLog._meta.db_table,
+        habit=Habit._meta.db_table,
+        where=("WHERE " + " AND ".join(conditions)) if conditions else "",
+    )
+    convert_date = connection.ops.convert_datefield_value
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            DayScore(convert_date(row[0], None, connection), row[1], row[2], row[3])
+            for row in cursor.fetchall()
+        ]
+
+
+def materialized_scores(start=None, end=None, using=DEFAULT_DB_ALIAS):
+    """Same rows as daily_scores(), read from the DailyScore table."""
+    qs = DailyScore.objects.using(using).order_by('date')
+    if start is not None:
+        qs = qs.filter(date__gte=start)
+    if end is not None:
+        qs = qs.filter(date__lte=end)
+    return [DayScore(*row) for row in qs.values_list('date', 'day_score', 'cumulative_score', 'completed_count')]
+
+
+def rebuild_daily_scores(using=DEFAULT_DB_ALIAS):
+    """Recompute the whole DailyScore table with one INSERT ... SELECT. Returns the row count."""
+    sql = _DAILY_SCORES_SQL.format(
+        entry=DailyEntry._meta.db_table,
+        log=HabitLog._meta.db_table,
+        habit=Habit._meta.db_table,
+        where="",
+    )
+    table = DailyScore._meta.db_table
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {table} (date, day_score, cumulative_score, completed_count) {sql}"
+            )
+            return cursor.rowcount
+
+
+def refresh_day(day, using=DEFAULT_DB_ALIAS):
+    """
+    Recompute one day's row and shift the running total of every later day
+    by the difference (a single UPDATE), instead of rescanning all logs.
+    """
+    with transaction.atomic(using=using):
+        totals = HabitLog.objects.using(using).filter(entry__date=day, completed=True).aggregate(
+            score=Sum(F('habit__positive_score') + F('habit__negative_score')),
+            done=Count('id'),
+        )
+        has_entry = DailyEntry.objects.using(using).filter(date=day).exists()
+        scores = DailyScore.objects.using(using)
+        old = scores.filter(date=day).first()
+        new_score = (totals['score'] or 0) if has_entry else 0
+        delta = new_score - (old.day_score if old else 0)
+
+        if has_entry:
+            previous = scores.filter(date__lt=day).order_by('-date').values_list('cumulative_score', flat=True).first()
+            scores.update_or_create(date=day, defaults={
+                'day_score': new_score,
+                'cumulative_score': (previous or 0) + new_score,
+                'completed_count': totals['done'],
+            })
+        elif old:
+            old.delete()
+
+        if delta:
+            scores.filter(date__gt=day).update(cumulative_score=F('cumulative_score') + delta)
+
+
+def habit_impacts(using=DEFAULT_DB_ALIAS):
+    """Habits (default ordering) annotated with done_count and impact, in one query."""
+    return Habit.objects.using(using).annotate(
+        done_count=Count("habitlog", filter=Q(habitlog__completed=True)),
+    ).annotate(
+        impact=F("done_count") * (F("positive_score") + F("negative_score")),
+    )
+
+
+def line_chart_data(start=None, end=None, max_points=None, using=DEFAULT_DB_ALIAS):
+    """
+    Cumulative score per day in [start, end]. With max_points, longer series
+    are reduced by LTTB so the curve keeps its shape in fewer points.
+    """
+    scores = materialized_scores(start, end, using)
+    if max_points:
+        keep = lttb([s.date.toordinal() for s in scores], [s.cumulative for s in scores], max_points)
+        if len(keep) < len(scores):
+            scores = [scores[i] for i in keep]
+    return {
+        'labels': [s.date.strftime('%Y-%m-%d') for s in scores],
+        'cumulative_score': [s.cumulative for s in scores],
+    }
+
+
+def bar_chart_data(using=DEFAULT_DB_ALIAS):
+    habits = list(habit_impacts(using))
+    return {
+        'labels': [h.name for h in habits],
+        'values': [h.impact for h in habits],
+    }
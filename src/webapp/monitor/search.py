@@ -0,0 +1,102 @@
+"""
+Full-text search over journal summaries, quotes, plans and branches.
+
+Each source has an external-content FTS5 table (migration 0007) kept in
+sync by triggers, so rows written with bulk_create or raw SQL are indexed
+too. A search is one UNION ALL of MATCH queries ranked by bm25, with
+highlighted snippets. `manage.py rebuild_search_index` rebuilds the tables.
+"""
+import html
+import re
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# kind -> (fts table, content table, title expression); mirrors migration 0007
+SOURCES = {
+    "entry": ("monitor_dailyentry_fts", "monitor_dailyentry", "c.date"),
+    "quote": ("monitor_quote_fts", "monitor_quote", "NULL"),
+    "plan": ("monitor_plan_fts", "monitor_plan", "c.title"),
+    "branch": ("monitor_branch_fts", "monitor_branch", "c.name"),
+}
+
+SNIPPET_TOKENS = 12
+
+# Control characters cannot come from the tokenizer, so they mark highlights
+# until the snippet has been HTML-escaped
+_OPEN, _CLOSE = "\x02", "\x03"
+
+_SELECT = """
+SELECT '{kind}', c.id, {title}, snippet({fts}, -1, %s, %s, '…', {tokens}), bm25({fts}) AS score
+FROM {fts} JOIN {table} c ON c.id = {fts}.rowid
+WHERE {fts} MATCH %s
+"""
+
+
+def match_expression(query):
+    """
+    FTS5 query for free text typed by the user: every word must appear, the
+    last one as a prefix (search-as-you-type). None when there is no word.
+    Operators and quotes are dropped rather than interpreted.
+    """
+    terms = re.findall(r"\w+", query or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+
+def search(query, kinds=None, limit=20, using=DEFAULT_DB_ALIAS):
+    """
+    Best matches first: [{kind, id, title, snippet}, ...]; the snippet is
+    HTML with matches wrapped in <mark>. Raises ValueError for unknown kinds.
+    """
+    kinds = list(SOURCES) if not kinds else list(kinds)
+    unknown = set(kinds) - set(SOURCES)
+    if unknown:
+        raise ValueError(f"Unknown kind '{sorted(unknown)[0]}'")
+    expression = match_expression(query)
+    if expression is None:
+        return []
+
+    selects, params = [], []
+    for kind in kinds:
+        fts, table, title = SOURCES[kind]
+        selects.append(_SELECT.format(kind=kind, fts=fts, table=table, title=title, tokens=SNIPPET_TOKENS))
+        params += [_OPEN, _CLOSE, expression]
+    sql = " UNION ALL ".join(selects) + " ORDER BY score LIMIT %s"
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        rows = cursor.fetchall()
+    return [
+        {"kind": kind, "id": pk, "title": None if title is None else str(title), "snippet": _highlight(snippet)}
+        for kind, pk, title, snippet, _ in rows
+    ]
+
+
+def matching_ids_sql(kind):
+    """SQL (one %s for the match expression) selecting the ids of `kind` rows that match."""
+    fts = SOURCES[kind][0]
+    return f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s"
+
+
+def _highlight(snippet):
+    return html.escape(snippet or "").replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """Re-read every source table into its index and merge the index segments."""
+    with connections[using].cursor() as cursor:
+        for fts, _, _ in SOURCES.values():
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+
+
+def verify(using=DEFAULT_DB_ALIAS):
+    """Kinds whose index disagrees with its source table."""
+    stale = []
+    with connections[using].cursor() as cursor:
+        for kind, (fts, _, _) in SOURCES.items():
+            try:
+                cursor.execute(f"INSERT INTO {fts}({fts}, rank) VALUES ('integrity-check', 1)")
+            except DatabaseError:
+                stale.append(kind)
+    return stale
@@ -0,0 +1,115 @@
+"""
+Keeps the materialized DailyScore table in sync (see monitor/scoring.py).
+
+Single-day changes refresh that day once per transaction. Deleting a Habit
+or changing its weights touches every day, so those schedule a full rebuild
+in a background thread after commit.
+"""
+import logging
+import threading
+
+from django.db import connections, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import scoring
+from .models import DailyEntry, Habit, HabitLog
+
+logger = logging.getLogger("LifeMonitor")
+
+_local = threading.local()
+
+
+def _pending():
+    # (using, day) -> the on_commit list the refresh was queued on. Django
+    # replaces that list on commit/rollback, so a stale entry never matches.
+    if not hasattr(_local, "days"):
+        _local.days = {}
+    return _local.days
+
+
+def schedule_refresh(day, using):
+    """Refresh `day` when the current transaction commits (once per day)."""
+    queue = connections[using].run_on_commit
+    pending = _pending()
+    if pending.get((using, day)) is queue:
+        return
+    pending[(using, day)] = queue
+
+    def run():
+        pending.pop((using, day), None)
+        scoring.refresh_day(day, using)
+
+    transaction.on_commit(run, using=using)
+
+
+def _rebuild_in_background(using):
+    try:
+        count = scoring.rebuild_daily_scores(using)
+        logger.info(f"DailyScore rebuilt in background ({count} days)")
+    except Exception as e:
+        logger.error(f"DailyScore rebuild failed: {e}", exc_info=True)
+    finally:
+        connections[using].close()
+
+
+def schedule_rebuild(using):
+    transaction.on_commit(
+        lambda: threading.Thread(target=_rebuild_in_background, args=(using,), daemon=True).start(),
+        using=using,
+    )
+
+
+@receiver(post_save, sender=HabitLog)
+def habit_log_saved(sender, instance, using, **kwargs):
+    schedule_refresh(instance.entry.date, using)
+
+
+@receiver(post_delete, sender=HabitLog)
+def habit_log_deleted(sender, instance, using, origin=None, **kwargs):
+    # Logs removed by a cascade are handled once by the parent's handler
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is None or origin_model is HabitLog:
+        schedule_refresh(instance.entry.date, using)
+
+
+@receiver(pre_save, sender=DailyEntry)
+def remember_entry_date(sender, instance, using, **kwargs):
+    instance._previous_date = None
+    if instance.pk:
+        instance._previous_date = (
+            DailyEntry.objects.using(using).filter(pk=instance.pk).values_list('date', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=DailyEntry)
+def entry_saved(sender, instance, using, **kwargs):
+    schedule_refresh(instance.date, using)
+    previous = getattr(instance, '_previous_date', None)
+    if previous and previous != instance.date:
+        schedule_refresh(previous, using)
+
+
+@receiver(post_delete, sender=DailyEntry)
+def entry_deleted(sender, instance, using, **kwargs):
+    schedule_refresh(instance.date, using)
+
+
+@receiver(post_delete, sender=Habit)
+def habit_deleted(sender, instance, using, **kwargs):
+    schedule_rebuild(using)
+
+
+@receiver(pre_save, sender=Habit)
+def remember_habit_weights(sender, instance, using, **kwargs):
+    instance._weights_changed = False
+    if instance.pk:
+        old = Habit.objects.using(using).filter(pk=instance.pk).values_list('positive_score', 'negative_score').first()
+        instance._weights_changed = old is not None and old != (instance.positive_score, instance.negative_score)
+
+
+@receiver(post_save, sender=Habit)
+def habit_saved(sender, instance, using, **kwargs):
+    if instance._weights_changed:
+        schedule_rebuild(using)
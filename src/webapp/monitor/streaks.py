@@ -0,0 +1,99 @@
+"""
+Habit streak and consistency engine.
+
+Each habit's history is one Python int used as a bit array: bit i is set
+when the habit was completed i days before `end`. A second bitset marks the
+days that have any DailyEntry. Both come from two GROUP BY queries that
+return every day offset as a group_concat string, so the ORM never builds
+per-row objects, and every metric is a handful of whole-bitset operations
+(mask, bit_count, shifts) per habit.
+"""
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from .models import DailyEntry, Habit, HabitLog
+
+WINDOWS = (7, 30, 90)
+
+HabitStreak = namedtuple("HabitStreak", "habit current longest rates")
+
+# Each day as its offset before the end date, comma-separated
+_LOGGED_SQL = """
+SELECT group_concat(CAST(julianday(%s) - julianday(date) AS INTEGER))
+FROM {entry} WHERE date <= %s
+"""
+_COMPLETED_SQL = """
+SELECT l.habit_id, group_concat(CAST(julianday(%s) - julianday(e.date) AS INTEGER))
+FROM {log} l JOIN {entry} e ON e.id = l.entry_id
+WHERE l.completed AND e.date <= %s
+GROUP BY l.habit_id
+"""
+
+
+def _bitset(offsets, size):
+    """Int with bit o set for each offset o in the comma-separated string."""
+    if not offsets:
+        return 0
+    digits = bytearray(b"0" * size)
+    for offset in map(int, offsets.split(",")):
+        digits[size - 1 - offset] = 49  # ord("1")
+    return int(digits, 2)
+
+
+def load_bitsets(end, using=DEFAULT_DB_ALIAS):
+    """
+    (logged, {habit_id: completed}, size): `logged` marks days with an entry,
+    `completed` the days each habit was done; bit 0 is `end`.
+    """
+    connection = connections[using]
+    end_param = connection.ops.adapt_datefield_value(end)
+    entry, log = DailyEntry._meta.db_table, HabitLog._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(_LOGGED_SQL.format(entry=entry), [end_param, end_param])
+        logged_offsets = cursor.fetchone()[0]
+        size = max(map(int, logged_offsets.split(","))) + 1 if logged_offsets else 1
+        cursor.execute(_COMPLETED_SQL.format(entry=entry, log=log), [end_param, end_param])
+        completed = {habit_id: _bitset(offsets, size) for habit_id, offsets in cursor.fetchall()}
+    return _bitset(logged_offsets, size), completed, size
+
+
+def current_streak(bits):
+    """
+    Consecutive completed days ending at bit 0. If bit 0 (today) isn't done
+    yet the streak is still alive and is counted from yesterday.
+    """
+    if not bits & 1:
+        bits >>= 1
+    # Trailing ones: x ^ (x + 1) sets them plus the first zero
+    return ((bits ^ (bits + 1)) >> 1).bit_length()
+
+
+def longest_streak(bits):
+    return max(map(len, bin(bits)[2:].split("0"))) if bits else 0
+
+
+def rate(bits, logged, days):
+    """Share of the logged days in the last `days` days on which the habit was done."""
+    mask = (1 << days) - 1
+    logged_days = (logged & mask).bit_count()
+    return round((bits & mask).bit_count() / logged_days, 3) if logged_days else None
+
+
+def habit_streaks(end=None, habits=None, using=DEFAULT_DB_ALIAS):
+    """One HabitStreak per habit (default ordering), as of `end` (default today)."""
+    end = end or timezone.now().date()
+    if habits is None:
+        habits = Habit.objects.using(using).all()
+    logged, completed, _ = load_bitsets(end, using)
+    results = []
+    for habit in habits:
+        bits = completed.get(habit.pk, 0)
+        results.append(HabitStreak(
+            habit,
+            current_streak(bits),
+            longest_streak(bits),
+            {days: rate(bits, logged, days) for days in WINDOWS},
+        ))
+    return results
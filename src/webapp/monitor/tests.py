@@ -1,3 +1,1202 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+
+from django.conf import settings
+
+from django.db import connection, connections, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.models import Count
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from monitor import calendar_tasks, export, journal, people, pivot, ranking, scoring, search, streaks, timeseries
+from monitor.downsample import lttb
+from monitor.models import Branch, CalendarTask, DailyEntry, DailyScore, Habit, HabitLog, Plan, Quote
+from user_monitoring.db_profile import get_profile
+from user_monitoring import response_cache
+from user_monitoring.db_registry import DatabaseRegistry, database_switched
+from user_monitoring.db_upload import UploadRejected, receive_database_upload
+from user_monitoring.middleware import DatabasePresence
+from user_monitoring.schema import disk_migrations, schema_is_current
+from user_monitoring.static_assets import ENV_FLAG, StaticAssetTable, content_hash, get_table
+
+
+class SchemaFingerprintTests(TestCase):
+    def test_migrated_database_is_current(self):
+        is_current, fp = schema_is_current()
+        self.assertTrue(is_current)
+        self.assertIn(("monitor", "0001_initial"), disk_migrations())
+
+    def test_missing_migration_forces_migrate(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM django_migrations WHERE app = 'monitor'")
+        is_current, _ = schema_is_current()
+        self.assertFalse(is_current)
+
+
+class StaticAssetTableTests(SimpleTestCase):
+    def serve(self, path, **environ):
+        environ.update(PATH_INFO=path, REQUEST_METHOD="GET")
+        captured = {}
+
+        def start_response(status, headers):
+            captured["status"] = status
+            captured["headers"] = dict(headers)
+
+        body = get_table().serve(environ, start_response)
+        return captured.get("status"), captured.get("headers"), body
+
+    def test_hashed_name_is_immutable_and_gzipped(self):
+        hashed = get_table().manifest["css/styles.css"]
+        status, headers, body = self.serve(f"/static/{hashed}", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(status, "200 OK")
+        self.assertIn("immutable", headers["Cache-Control"])
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertLess(len(body[0]), 60000)
+
+    def test_etag_revalidation_returns_304(self):
+        _, headers, _ = self.serve("/static/css/styles.css")
+        self.assertEqual(headers["Cache-Control"], "no-cache")
+        status, _, _ = self.serve("/static/css/styles.css", HTTP_IF_NONE_MATCH=headers["ETag"])
+        self.assertEqual(status, "304 Not Modified")
+
+    def test_etags_are_content_hashes_matched_exactly(self):
+        table = StaticAssetTable(source_dirs=[])
+        table._add("LICENSE", b"licence text")
+        table._add("vendor.d/lib.js", b"var lib;")
+        for name, body in (("LICENSE", b"licence text"), ("vendor.d/lib.js", b"var lib;")):
+            self.assertEqual(table.assets[f"/static/{name}"].etag, content_hash(body))
+        environ = {"PATH_INFO": "/static/LICENSE", "REQUEST_METHOD": "GET"}
+        statuses = []
+        start_response = lambda status, headers: statuses.append(status)
+        etag = f'"{content_hash(b"licence text")}"'
+        for header in (f'"x", W/{etag}', f'"{content_hash(b"licence text")}-gz"', f'"prefix{etag[1:]}'):
+            table.serve(dict(environ, HTTP_IF_NONE_MATCH=header), start_response)
+        self.assertEqual(statuses, ["304 Not Modified", "200 OK", "200 OK"])
+
+    def test_unknown_path_falls_through(self):
+        status, _, body = self.serve("/static/admin/css/base.css")
+        self.assertIsNone(body)
+        self.assertIsNone(status)
+
+    def test_static_tag_uses_hashed_name_inside_shell(self):
+        self.assertEqual(static("css/styles.css"), "/static/css/styles.css")
+        with mock.patch.dict(os.environ, {ENV_FLAG: "1"}):
+            self.assertEqual(static("css/styles.css"), "/static/" + get_table().manifest["css/styles.css"])
+
+
+class SqliteProfileTests(TestCase):
+    def test_profile_pragmas_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], get_profile()["busy_timeout"])
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+
+class DatabaseRegistryTests(TestCase):
+    def tearDown(self):
+        # Drop aliases registered by the test so the test case teardown only sees its own
+        for alias in list(settings.DATABASES):
+            if alias.startswith("sqlite_"):
+                settings.DATABASES.pop(alias)
+                if hasattr(connections._connections, alias):
+                    del connections[alias]
+
+    def test_switch_migrates_in_background_then_repoints_default(self):
+        folder = Path(tempfile.mkdtemp())
+        new_db = folder / "second.sqlite3"
+        registry = DatabaseRegistry()
+        previous = settings.DATABASES["default"]["NAME"]
+        # Let the background thread connect to the new alias
+        allowed = {"default", registry.alias_for(new_db)}
+        try:
+            with mock.patch.object(type(self), "databases", allowed):
+                self.assertTrue(registry.switch_to(new_db, folder))
+                self.assertTrue(registry.wait(60))
+            self.assertEqual(registry.status["state"], "ready")
+            self.assertGreater(registry.status["applied"], 0)
+            self.assertEqual(registry.status["applied"], registry.status["total"])
+            self.assertEqual(settings.DATABASES["default"]["NAME"], new_db.resolve())
+        finally:
+            settings.DATABASES["default"]["NAME"] = previous
+
+        with open(folder / "db_config.json") as f:
+            self.assertEqual(json.load(f)["db_path"], str(new_db.resolve()))
+        tables = {row[0] for row in sqlite3.connect(new_db).execute("SELECT name FROM sqlite_master")}
+        self.assertIn("monitor_habitlog", tables)
+
+    def test_each_file_gets_its_own_alias(self):
+        registry = DatabaseRegistry()
+        a = registry.alias_for("/tmp/a.sqlite3")
+        self.assertEqual(a, registry.alias_for("/tmp/a.sqlite3"))
+        self.assertNotEqual(a, registry.alias_for("/tmp/b.sqlite3"))
+        self.assertEqual(str(settings.DATABASES[a]["NAME"]), str(Path("/tmp/a.sqlite3").resolve()))
+
+
+class DatabaseUploadTests(SimpleTestCase):
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+
+    def sqlite_bytes(self, wal=False):
+        source = self.folder / "source.bin"
+        conn = sqlite3.connect(source)
+        if wal:
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE t (x)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+        conn.close()
+        data = source.read_bytes()
+        source.unlink()
+        return data
+
+    def test_valid_upload_is_installed(self):
+        data = self.sqlite_bytes()
+        result = receive_database_upload(SimpleUploadedFile("../journal.sqlite3", data), self.folder)
+        self.assertEqual(result.path, self.folder / "journal.sqlite3")
+        self.assertEqual(result.size, len(data))
+        self.assertEqual(result.path.read_bytes(), data)
+        self.assertEqual([p.name for p in self.folder.iterdir()], ["journal.sqlite3"])
+
+    def test_wal_database_leaves_no_sidecars(self):
+        data = self.sqlite_bytes(wal=True)
+        self.assertEqual(data[18:20], b"\x02\x02")
+        result = receive_database_upload(SimpleUploadedFile("journal.sqlite3", data), self.folder)
+        self.assertEqual([p.name for p in self.folder.iterdir()], ["journal.sqlite3"])
+        conn = sqlite3.connect(result.path)
+        self.assertEqual(conn.execute("SELECT x FROM t").fetchall(), [(1,)])
+        conn.close()
+
+    def test_invalid_uploads_leave_no_trace(self):
+        corrupt = bytearray(self.sqlite_bytes())
+        corrupt[100:] = b"\xff" * (len(corrupt) - 100)
+        for name, data in [("a.txt", b"x"), ("a.db", b"not sqlite"), ("a.db", bytes(corrupt))]:
+            with self.assertRaises(UploadRejected):
+                receive_database_upload(SimpleUploadedFile(name, data), self.folder)
+        self.assertEqual(list(self.folder.iterdir()), [])
+
+    def test_active_database_is_never_overwritten(self):
+        active = self.folder / "live.sqlite3"
+        active.write_bytes(b"live")
+        with mock.patch.dict(settings.DATABASES["default"], {"NAME": active}):
+            result = receive_database_upload(SimpleUploadedFile("live.sqlite3", self.sqlite_bytes()), self.folder)
+        self.assertEqual(active.read_bytes(), b"live")
+        self.assertNotEqual(result.path, active)
+
+
+class DatabasePresenceTests(SimpleTestCase):
+    def test_presence_is_cached_until_invalidated(self):
+        folder = Path(tempfile.mkdtemp())
+        db = folder / "x.sqlite3"
+        presence = DatabasePresence(poll_interval=3600)
+        with mock.patch.dict(settings.DATABASES["default"], {"NAME": db}):
+            self.assertFalse(presence.is_present())
+            db.write_bytes(b"")
+            with mock.patch("os.path.exists") as exists:
+                self.assertFalse(presence.is_present())
+                exists.assert_not_called()
+            presence.invalidate()
+            self.assertTrue(presence.is_present())
+
+    def test_switching_file_rechecks(self):
+        presence = DatabasePresence(poll_interval=3600)
+        folder = Path(tempfile.mkdtemp())
+        (folder / "a.sqlite3").write_bytes(b"")
+        with mock.patch.dict(settings.DATABASES["default"], {"NAME": folder / "a.sqlite3"}):
+            self.assertTrue(presence.is_present())
+        with mock.patch.dict(settings.DATABASES["default"], {"NAME": folder / "b.sqlite3"}):
+            self.assertFalse(presence.is_present())
+
+
+def seed_journal(days=40, start=date(2024, 1, 1)):
+    """Habits with mixed weights and a deterministic completion pattern."""
+    habits = [
+        Habit.objects.create(name="Read", positive_score=2, order=1),
+        Habit.objects.create(name="Gym", positive_score=3, negative_score=0, order=2),
+        Habit.objects.create(name="Doomscroll", positive_score=0, negative_score=-2, order=3),
+        Habit.objects.create(name="Unused", positive_score=5, order=4),
+    ]
+    for d in range(days):
+        entry = DailyEntry.objects.create(date=start + timedelta(days=d), loved_someone=["Ann", " ann", "Bob", ""][d % 4])
+        for i, habit in enumerate(habits[:3]):
+            HabitLog.objects.create(entry=entry, habit=habit, completed=(d + i) % (i + 2) == 0)
+    return habits
+
+
+def legacy_chart_data():
+    """The chart_view loop this engine replaced, kept as the reference result."""
+    labels, cumulative, total = [], [], 0
+    for entry in DailyEntry.objects.all().order_by('date'):
+        labels.append(entry.date.strftime('%Y-%m-%d'))
+        for log in entry.habit_logs.all():
+            if log.completed:
+                total += log.habit.positive_score + log.habit.negative_score
+        cumulative.append(total)
+    bar_labels, bar_values = [], []
+    for habit in Habit.objects.all():
+        bar_labels.append(habit.name)
+        done = HabitLog.objects.filter(habit=habit, completed=True).count()
+        bar_values.append(done * (habit.positive_score + habit.negative_score))
+    return {'labels': labels, 'cumulative_score': cumulative}, {'labels': bar_labels, 'values': bar_values}
+
+
+
+def reset_response_cache():
+    """Test rollbacks rewind the DataStamp, so a token can repeat with other data."""
+    response_cache.cache.clear()
+
+class ScoringEngineTests(TestCase):
+    def setUp(self):
+        seed_journal()
+        scoring.rebuild_daily_scores()
+
+    def test_matches_legacy_loop(self):
+        line, bar = legacy_chart_data()
+        self.assertEqual(scoring.line_chart_data(), line)
+        self.assertEqual(scoring.bar_chart_data(), bar)
+
+    def test_query_counts(self):
+        with self.assertNumQueries(1):
+            scoring.line_chart_data()
+        with self.assertNumQueries(1):
+            scoring.bar_chart_data()
+
+    def test_window_keeps_running_total(self):
+        full = scoring.daily_scores()
+        window = scoring.daily_scores(start=date(2024, 1, 11), end=date(2024, 1, 20))
+        self.assertEqual(len(window), 10)
+        self.assertEqual(window, full[10:20])
+
+    def test_entry_without_logs_scores_zero(self):
+        DailyEntry.objects.create(date=date(2025, 1, 1))
+        last = scoring.daily_scores()[-1]
+        self.assertEqual((last.day_score, last.completed), (0, 0))
+        self.assertEqual(last.cumulative, scoring.daily_scores()[-2].cumulative)
+
+
+class DownsampleTests(SimpleTestCase):
+    def test_keeps_endpoints_and_peaks(self):
+        xs = list(range(1000))
+        ys = [x % 50 for x in xs]
+        ys[437] = 500  # a one-day spike must survive
+        keep = lttb(xs, ys, 100)
+        self.assertEqual(len(keep), 100)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertIn(437, keep)
+        self.assertEqual(keep, sorted(keep))
+
+    def test_short_series_untouched(self):
+        self.assertEqual(lttb([1, 2, 3], [1, 2, 3], 10), [0, 1, 2])
+        self.assertEqual(lttb(list(range(10)), list(range(10)), 0), list(range(10)))
+
+    def test_tiny_thresholds_are_honoured(self):
+        xs = list(range(10))
+        self.assertEqual(lttb(xs, xs, 1), [9])
+        self.assertEqual(lttb(xs, xs, 2), [0, 9])
+        self.assertEqual(len(lttb(xs, xs, 3)), 3)
+
+    def test_cumulative_curve_shape(self):
+        # A noisy running total: the reduced curve stays within a sliver of the range
+        ys, total = [], 0
+        for x in range(3000):
+            total += (x * 7919) % 11 - 4
+            ys.append(total)
+        keep = lttb(list(range(3000)), ys, 400)
+        worst = 0
+        for a, b in zip(keep, keep[1:]):
+            for x in range(a, b + 1):
+                interpolated = ys[a] + (ys[b] - ys[a]) * (x - a) / (b - a)
+                worst = max(worst, abs(interpolated - ys[x]))
+        self.assertLess(worst, 0.02 * (max(ys) - min(ys)))
+
+
+class LineChartDownsamplingTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            seed_journal(days=120)
+        reset_response_cache()
+        self.client.force_login(User.objects.create_user("lttb", password="lttb"))
+
+    def test_max_points(self):
+        full = scoring.line_chart_data()
+        reduced = scoring.line_chart_data(max_points=30)
+        self.assertEqual(len(full["labels"]), 120)
+        self.assertEqual(len(reduced["labels"]), 30)
+        self.assertEqual(reduced["labels"][-1], full["labels"][-1])
+        self.assertEqual(reduced["cumulative_score"][-1], full["cumulative_score"][-1])
+
+    def test_zoom_returns_full_resolution(self):
+        url = reverse("life_score_api")
+        data = self.client.get(url, {"start": "2024-02-01", "end": "2024-02-29", "max_points": 0}).json()
+        self.assertEqual(len(data["labels"]), 29)
+        self.assertEqual(data, scoring.line_chart_data(date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertEqual(len(self.client.get(url, {"max_points": 50}).json()["labels"]), 50)
+        self.assertEqual(self.client.get(url, {"max_points": "-1"}).status_code, 400)
+        self.assertEqual(len(self.client.get(url, {"max_points": 2}).json()["labels"]), 2)
+
+    def test_malformed_dates_are_bad_requests(self):
+        for name in ("life_score_api", "download_excel", "habit_streaks_api", "timeseries_api", "people_api"):
+            for param in ("end",) if name == "habit_streaks_api" else ("start", "end"):
+                response = self.client.get(reverse(name), {param: "2024-13-45"})
+                self.assertEqual(response.status_code, 400, (name, param))
+                self.assertEqual(response.json(), {"error": f"Invalid {param}: expected YYYY-MM-DD"})
+        self.assertEqual(self.client.get(reverse("chart"), {"start": "2024-13-45"}).status_code, 400)
+        response = self.client.get(reverse("load-tasks"), {"date": "soon"})
+        self.assertEqual((response.status_code, response.json()), (400, {"error": "Invalid date: expected YYYY-MM-DD"}))
+
+    def test_chart_view_downsamples_by_default(self):
+        with mock.patch.object(scoring, "DEFAULT_MAX_POINTS", 40):
+            response = self.client.get(reverse("chart"))
+        self.assertEqual(len(response.context["line_chart_data"]["labels"]), 40)
+
+class PivotMatrixTests(TestCase):
+    def setUp(self):
+        reset_response_cache()
+        self.habits = seed_journal()
+
+    def test_matches_per_cell_lookup(self):
+        start, end = date(2024, 1, 5), date(2024, 1, 25)
+        expected = []
+        for entry in DailyEntry.objects.filter(date__range=[start, end]).order_by('date'):
+            row = {'date': entry.date.strftime('%Y-%m-%d')}
+            for habit in self.habits:
+                log = entry.habit_logs.filter(habit=habit).first()
+                row[habit.name] = 1 if (log and log.completed) else 0
+            expected.append(row)
+        matrix = pivot.habit_matrix(self.habits, start, end)
+        self.assertEqual(pivot.matrix_records(self.habits, matrix), expected)
+
+    def test_single_query_for_any_range(self):
+        with self.assertNumQueries(1):
+            matrix = pivot.habit_matrix(self.habits)
+        self.assertEqual(len(matrix), 40)
+        self.assertEqual(pivot.habit_matrix(self.habits, start=date(2024, 2, 5)), matrix[35:])
+
+    def test_view_data_query_count_is_flat(self):
+        user = User.objects.create_user("pivot", password="pivot")
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as month:
+            response = self.client.get(reverse("view_data"), {"month": 1, "year": 2024})
+        self.assertEqual(len(json.loads(response.context["habit_data_json"])), 31)
+        self.assertLess(len(month), 15)
+
+class ExportTests(TestCase):
+    def setUp(self):
+        reset_response_cache()
+        self.habits = seed_journal(days=20)
+        self.client.force_login(User.objects.create_user("export", password="export"))
+
+    def get(self, **params):
+        return self.client.get(reverse("download_excel"), params)
+
+    def test_csv_and_ndjson_agree(self):
+        response = self.get(format="csv", start="2024-01-05", end="2024-01-09")
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], ["Date", "Read", "Gym", "Doomscroll", "Unused", "Loved Someone", "Daily Summary"])
+        self.assertEqual([r[0] for r in rows[1:]], [f"2024-01-0{d}" for d in range(5, 10)])
+
+        response = self.get(format="ndjson", start="2024-01-05", end="2024-01-09")
+        records = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([list(r.values()) for r in records], rows[1:])
+
+    def test_xlsx_matches_per_cell_lookup(self):
+        response = self.get(habits=[self.habits[1].pk, self.habits[2].pk])
+        sheet = openpyxl.load_workbook(io.BytesIO(b"".join(response.streaming_content))).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ("Date", "Gym", "Doomscroll", "Loved Someone", "Daily Summary"))
+        for entry, row in zip(DailyEntry.objects.order_by("date"), rows[1:]):
+            cells = [
+                "Yes" if HabitLog.objects.filter(entry=entry, habit=h, completed=True).exists() else "No"
+                for h in self.habits[1:3]
+            ]
+            self.assertEqual(list(row[1:3]), cells)
+        self.assertEqual(len(rows), 21)
+
+    def test_rows_use_one_query(self):
+        with self.assertNumQueries(1):
+            rows = list(export.export_rows(self.habits))
+        self.assertEqual(len(rows), 21)
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.get(format="pdf").status_code, 400)
+        self.assertEqual(self.get(start="yesterday").status_code, 400)
+
+class StreakEngineTests(TestCase):
+    def setUp(self):
+        reset_response_cache()
+        self.habits = seed_journal()
+        self.end = date(2024, 2, 9)  # last seeded day
+
+    def reference(self, habit, end):
+        done = set(HabitLog.objects.filter(habit=habit, completed=True).values_list("entry__date", flat=True))
+        logged = set(DailyEntry.objects.values_list("date", flat=True))
+        day = end if end in done else end - timedelta(days=1)
+        current = 0
+        while day in done:
+            current, day = current + 1, day - timedelta(days=1)
+        longest = run = 0
+        for d in range(400):
+            run = run + 1 if end - timedelta(days=d) in done else 0
+            longest = max(longest, run)
+        rates = {}
+        for days in streaks.WINDOWS:
+            window = {end - timedelta(days=d) for d in range(days)}
+            rates[days] = round(len(done & window) / len(logged & window), 3) if logged & window else None
+        return current, longest, rates
+
+    def test_matches_day_by_day_reference(self):
+        for end in (self.end, date(2024, 1, 20), date(2024, 3, 1)):
+            for result in streaks.habit_streaks(end):
+                self.assertEqual(
+                    (result.current, result.longest, result.rates), self.reference(result.habit, end), (end, result)
+                )
+
+    def test_query_count(self):
+        with self.assertNumQueries(3):  # habits + logged days + completions
+            streaks.habit_streaks(self.end)
+
+    def test_bit_helpers(self):
+        self.assertEqual(streaks.current_streak(0b0111), 3)
+        self.assertEqual(streaks.current_streak(0b0110), 2)  # today not done yet
+        self.assertEqual(streaks.current_streak(0b0100), 0)
+        self.assertEqual(streaks.longest_streak(0b1110011110), 4)
+        self.assertEqual(streaks.longest_streak(0), 0)
+
+    def test_api(self):
+        self.client.force_login(User.objects.create_user("streaks", password="streaks"))
+        response = self.client.get(reverse("habit_streaks_api"), {"end": "2024-02-09"})
+        data = response.json()["habits"]
+        self.assertEqual([h["name"] for h in data], ["Read", "Gym", "Doomscroll", "Unused"])
+        self.assertEqual(data[3], {
+            "id": self.habits[3].id, "name": "Unused", "current_streak": 0, "longest_streak": 0,
+            "completion_rates": {"7": 0.0, "30": 0.0, "90": 0.0},
+        })
+        self.assertEqual(self.client.get(reverse("habit_streaks_api"), {"end": "soon"}).status_code, 400)
+
+class TimeseriesTests(TestCase):
+    def setUp(self):
+        self.habits = seed_journal()
+        # ISO weeks across year boundaries
+        for day in (date(2021, 1, 1), date(2024, 12, 30), date(2027, 1, 3)):
+            DailyEntry.objects.create(date=day, loved_someone="Zoe")
+
+    def reference(self, key):
+        buckets = {}
+        for entry in DailyEntry.objects.order_by("date"):
+            b = buckets.setdefault(key(entry.date), {"entries": 0, "score": 0, "loved": 0, "done": [0] * 4})
+            b["entries"] += 1
+            b["loved"] += bool(entry.loved_someone.strip())
+            for log in entry.habit_logs.filter(completed=True):
+                b["score"] += log.habit.positive_score + log.habit.negative_score
+                b["done"][self.habits.index(log.habit)] += 1
+        return buckets
+
+    def test_resolutions_match_python_bucketing(self):
+        keys = {
+            "day": lambda d: d.isoformat(),
+            "week": lambda d: "%d-W%02d" % d.isocalendar()[:2],
+            "month": lambda d: d.strftime("%Y-%m"),
+            "year": lambda d: str(d.year),
+        }
+        for resolution, key in keys.items():
+            expected = self.reference(key)
+            with self.assertNumQueries(1):
+                series = timeseries.timeseries(resolution, habits=self.habits)
+            self.assertEqual(series["buckets"], sorted(expected), resolution)
+            self.assertEqual(series["score"], [b["score"] for _, b in sorted(expected.items())])
+            self.assertEqual(series["loved"], [b["loved"] for _, b in sorted(expected.items())])
+            self.assertEqual(series["entries"], [b["entries"] for _, b in sorted(expected.items())])
+            self.assertEqual(
+                series["habits"]["completed"],
+                [[b["done"][i] for _, b in sorted(expected.items())] for i in range(4)],
+            )
+        self.assertIn("2020-W53", timeseries.timeseries("week")["buckets"])
+        self.assertIn("2025-W01", timeseries.timeseries("week")["buckets"])
+
+    def test_api_filters(self):
+        reset_response_cache()
+        self.client.force_login(User.objects.create_user("series", password="series"))
+        url = reverse("timeseries_api")
+        data = self.client.get(url, {
+            "resolution": "week", "start": "2024-01-01", "end": "2024-01-14", "habits": self.habits[1].pk,
+        }).json()
+        self.assertEqual(data["buckets"], ["2024-W01", "2024-W02"])
+        self.assertEqual(data["habits"]["names"], ["Gym"])
+        self.assertEqual(len(data["habits"]["completed"]), 1)
+        self.assertEqual(self.client.get(url, {"resolution": "hour"}).status_code, 400)
+        empty = self.client.get(url, {"start": "1999-01-01", "end": "1999-02-01"}).json()
+        self.assertEqual((empty["buckets"], empty["habits"]["completed"]), ([], [[], [], [], []]))
+
+class PeopleIndexTests(TestCase):
+    def setUp(self):
+        seed_journal()
+
+    def legacy_counts(self, start, end):
+        """The view_data dict this index replaced."""
+        counts = {}
+        for entry in DailyEntry.objects.filter(date__range=[start, end]):
+            name = entry.loved_someone.lower().strip()
+            if name:
+                counts[name] = counts.get(name, 0) + 1
+        return {name.title(): days for name, days in counts.items()}
+
+    def test_key_is_normalized_on_save(self):
+        entry = DailyEntry.objects.create(date=date(2030, 1, 1), loved_someone="  Mary   JANE ")
+        self.assertEqual(entry.loved_key, "mary jane")
+        entry.loved_someone = "Bob"
+        entry.save(update_fields=["loved_someone"])
+        entry.refresh_from_db()
+        self.assertEqual(entry.loved_key, "bob")
+
+    def test_top_people_matches_legacy_counting(self):
+        start, end = date(2024, 1, 5), date(2024, 1, 31)
+        with self.assertNumQueries(1):
+            top = people.top_people(start, end)
+        self.assertEqual(dict(top), self.legacy_counts(start, end))
+        self.assertEqual(top[0], ("Ann", 14))
+        self.assertEqual(people.top_people(limit=1), [("Ann", 20)])
+        self.assertEqual(people.top_people(limit=0), [])
+
+    def test_backfill_fixes_rows_written_around_save(self):
+        DailyEntry.objects.filter(date__lte=date(2024, 1, 10)).update(loved_key="")
+        DailyEntry.objects.bulk_create([DailyEntry(date=date(2030, 1, 1), loved_someone="Zoe ")])
+        out = io.StringIO()
+        call_command("backfill_people", stdout=out)
+        self.assertIn("Updated 9 entries", out.getvalue())
+        self.assertEqual(people.top_people(limit=1), [("Ann", 20)])
+        self.assertIn(("Zoe", 1), people.top_people())
+        self.assertEqual(people.backfill_loved_keys(), 0)
+
+    def test_grouping_uses_the_index(self):
+        sql, params = (
+            DailyEntry.objects.filter(date__gte=date(2024, 1, 1)).exclude(loved_key="")
+            .values("loved_key").annotate(n=Count("id")).query.sql_with_params()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("monitor_entry_date_loved", plan)
+
+    def test_api(self):
+        reset_response_cache()
+        self.client.force_login(User.objects.create_user("people", password="people"))
+        url = reverse("people_api")
+        data = self.client.get(url, {"start": "2024-01-01", "end": "2024-01-08", "limit": 1}).json()
+        self.assertEqual(data, {"names": ["Ann"], "days": [4]})
+        self.assertEqual(self.client.get(url, {"limit": "many"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"limit": -1}).json(), {"error": "Invalid limit"})
+        self.assertEqual(len(self.client.get(url, {"limit": 0}).json()["names"]), len(people.top_people()))
+
+
+class LovedKeyMigrationTests(TransactionTestCase):
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def stamp_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'monitor_dailyentry'")
+            return {name for name, in cursor.fetchall() if "_stamp_" in name}
+
+    def test_rebuild_keeps_stamp_triggers(self):
+        expected = {f"monitor_dailyentry_stamp_{event}" for event in ("insert", "update", "delete")}
+        executor = MigrationExecutor(connection)
+        executor.migrate([("monitor", "0004_dailyscore")])
+        for target in ("0005_datastamp", "0006_dailyentry_loved_key", "0005_datastamp"):
+            executor = MigrationExecutor(connection)
+            executor.migrate([("monitor", target)])
+            self.assertEqual(self.stamp_triggers(), expected, target)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.entry = DailyEntry.objects.create(date=date(2024, 3, 1), daily_summary="Long run by the river, then <b>café</b>.")
+        DailyEntry.objects.create(date=date(2024, 3, 2), daily_summary="Rainy day, read a book about rivers.")
+        self.quote = Quote.objects.create(text="The river is everywhere at once.")
+        plan = Plan.objects.create(title="Marathon", description="Build up to a river marathon")
+        self.branch = Branch.objects.create(plan=plan, name="Base miles", notes="Easy running")
+
+    def test_ranked_results_with_highlighted_snippets(self):
+        with self.assertNumQueries(1):
+            results = search.search("river")
+        self.assertEqual({(r["kind"], r["id"]) for r in results}, {
+            ("entry", self.entry.pk), ("entry", self.entry.pk + 1), ("quote", self.quote.pk), ("plan", self.branch.plan_id),
+        })
+        entry = next(r for r in results if r["id"] == self.entry.pk and r["kind"] == "entry")
+        self.assertEqual(entry["title"], "2024-03-01")
+        self.assertIn("<mark>river</mark>", entry["snippet"])
+        self.assertIn("&lt;b&gt;", entry["snippet"])
+        # Prefix on the last word, diacritics folded, operators ignored
+        self.assertEqual(len(search.search("rive")), 4)
+        self.assertEqual(len(search.search("runn")), 1)
+        self.assertEqual([r["id"] for r in search.search('("cafe')], [self.entry.pk])
+        self.assertEqual(search.search("  ) "), [])
+        self.assertEqual(search.search("river", kinds=["quote"])[0]["id"], self.quote.pk)
+        with self.assertRaises(ValueError):
+            search.search("river", kinds=["todo"])
+
+    def test_triggers_follow_updates_and_deletes(self):
+        self.branch.notes = "Hill repeats"
+        self.branch.save()
+        self.assertEqual(search.search("easy"), [])
+        self.assertEqual(search.search("hill")[0]["id"], self.branch.pk)
+        self.quote.delete()
+        self.assertEqual(search.search("everywhere"), [])
+        DailyEntry.objects.bulk_create([DailyEntry(date=date(2024, 3, 3), daily_summary="Bulk imported kayak trip")])
+        self.assertEqual(len(search.search("kayak")), 1)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO monitor_quote_fts(monitor_quote_fts) VALUES ('delete-all')")
+        self.assertEqual(search.verify(), ["quote"])
+        with self.assertRaises(SystemExit):
+            call_command("rebuild_search_index", "--verify", stdout=io.StringIO(), stderr=io.StringIO())
+        call_command("rebuild_search_index", stdout=io.StringIO())
+        self.assertEqual(search.verify(), [])
+        self.assertEqual(search.search("everywhere")[0]["id"], self.quote.pk)
+
+    def test_api_and_admin(self):
+        user = User.objects.create_superuser("search", password="search")
+        self.client.force_login(user)
+        url = reverse("search_api")
+        data = self.client.get(url, {"q": "run river", "kinds": "entry", "limit": 1}).json()
+        self.assertEqual([r["id"] for r in data["results"]], [self.entry.pk])
+        self.assertEqual(self.client.get(url, {"q": "river", "kinds": "todo"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"q": "river", "limit": "x"}).status_code, 400)
+        response = self.client.get(reverse("admin:monitor_dailyentry_changelist"), {"q": "book"})
+        self.assertEqual(list(response.context["cl"].result_list), list(DailyEntry.objects.filter(date=date(2024, 3, 2))))
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.habits = seed_journal(days=10)
+        scoring.rebuild_daily_scores()
+        self.client.force_login(User.objects.create_user("cache", password="cache"))
+        reset_response_cache()
+
+    def test_lru_is_capped_by_bytes(self):
+        lru = response_cache.ResponseCache(max_bytes=10)
+        for key in "abc":
+            lru.set(key, response_cache.CachedResponse(b"xxxx", 200, []))
+        self.assertIsNone(lru.get("a"))
+        self.assertEqual((len(lru), lru.size), (2, 8))
+        lru.get("b")
+        lru.set("d", response_cache.CachedResponse(b"xxxx", 200, []))
+        self.assertIsNotNone(lru.get("b"))
+        self.assertIsNone(lru.get("c"))
+        lru.set("huge", response_cache.CachedResponse(b"x" * 11, 200, []))
+        self.assertIsNone(lru.get("huge"))
+
+    def test_hit_conditional_get_and_invalidation(self):
+        first = self.client.get(reverse("chart"))
+        etag = first["ETag"]
+        with self.assertNumQueries(3):  # session + user + stamp; the view doesn't run
+            second = self.client.get(reverse("chart"))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(self.client.get(reverse("chart"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Validated by the ETag alone: a date can't see writes from other processes
+        self.assertFalse(first.has_header("Last-Modified"))
+        since = self.client.get(reverse("chart"), HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(since.status_code, 200)
+
+        HabitLog.objects.create(entry=DailyEntry.objects.first(), habit=self.habits[3], completed=True)
+        third = self.client.get(reverse("chart"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third["ETag"], etag)
+
+    def test_streams_get_validators_but_are_not_stored(self):
+        response = self.client.get(reverse("download_excel"), {"format": "csv"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(response_cache.cache), 0)
+        again = self.client.get(reverse("download_excel"), {"format": "csv"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_switch_drops_previous_database(self):
+        self.client.get(reverse("chart"))
+        self.assertEqual(len(response_cache.cache), 1)
+        database_switched.send(sender=DatabaseRegistry, path="/new.sqlite3",
+                               previous=settings.DATABASES["default"]["NAME"])
+        self.assertEqual(len(response_cache.cache), 0)
+
+    def test_stamp_follows_every_write(self):
+        token = response_cache.data_token()
+        HabitLog.objects.bulk_create([HabitLog(entry=DailyEntry.objects.first(), habit=self.habits[3])])
+        file_id, version = response_cache.data_token().split(".")
+        self.assertEqual(token, f"{file_id}.{int(version) - 1}")
+
+    def test_writes_bypassing_signals_invalidate(self):
+        first = self.client.get(reverse("chart"))
+        HabitLog.objects.filter(habit=self.habits[0]).update(completed=False)
+        second = self.client.get(reverse("chart"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.content, first.content)
+
+
+class DiskCacheTests(TestCase):
+    def setUp(self):
+        self.habits = seed_journal(days=10)
+        scoring.rebuild_daily_scores()
+        self.client.force_login(User.objects.create_user("disk", password="disk"))
+        reset_response_cache()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        location = Path(self.tmp.name) / "analytics.sqlite3"
+        caches_setting = dict(settings.CACHES, analytics={
+            "BACKEND": "user_monitoring.disk_cache.SQLiteCache", "LOCATION": location, "TIMEOUT": None,
+        })
+        overridden = override_settings(CACHES=caches_setting)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        # The test database lives in memory, for which the disk tier is off
+        patcher = mock.patch.object(response_cache, "connection")
+        patcher.start().creation.is_in_memory_db.return_value = False
+        self.addCleanup(patcher.stop)
+        self.disk = caches["analytics"]
+
+    def test_backend_basics_and_prefixes(self):
+        self.disk.set("resp:a:1:x", {"v": 1})
+        self.disk.set("resp:a:2:x", [2])
+        self.disk.set("resp:b:1:x", 3, timeout=-1)
+        self.assertEqual(self.disk.get("resp:a:1:x"), {"v": 1})
+        self.assertIsNone(self.disk.get("resp:b:1:x"))
+        self.assertFalse(self.disk.add("resp:a:2:x", 0))
+        self.assertEqual(self.disk.get_prefix("resp:a:"), {"resp:a:1:x": {"v": 1}, "resp:a:2:x": [2]})
+        self.assertEqual(self.disk.delete_prefix("resp:a:", keep="resp:a:2:"), 1)
+        self.assertEqual(list(self.disk.get_prefix("resp:")), ["resp:a:2:x"])
+
+    def test_restart_is_a_cache_hit(self):
+        first = self.client.get(reverse("chart"))
+        # Simulate a restart: the memory tier is gone
+        reset_response_cache()
+        self.assertEqual(response_cache.warm(), 1)
+        with self.assertNumQueries(3):  # session + user + stamp; the view doesn't run
+            second = self.client.get(reverse("chart"))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_changed_data_prunes_old_entries(self):
+        self.client.get(reverse("chart"))
+        with self.captureOnCommitCallbacks(execute=True):
+            HabitLog.objects.create(entry=DailyEntry.objects.first(), habit=self.habits[3], completed=True)
+        reset_response_cache()
+        self.assertEqual(response_cache.warm(), 0)
+        self.assertEqual(self.disk.get_prefix("resp:"), {})
+
+class DailyScoreTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.habits = seed_journal(days=10)
+
+    def count_refreshes(self):
+        return mock.patch.object(scoring, "refresh_day", wraps=scoring.refresh_day)
+
+    def assertInSync(self):
+        self.assertEqual(scoring.materialized_scores(), scoring.daily_scores())
+
+    def test_log_changes_refresh_one_day(self):
+        entry = DailyEntry.objects.get(date=date(2024, 1, 3))
+        with self.count_refreshes() as refresh, self.captureOnCommitCallbacks(execute=True):
+            log = entry.habit_logs.get(habit=self.habits[1])
+            log.completed = not log.completed
+            log.save()
+            HabitLog.objects.create(entry=entry, habit=self.habits[3], completed=True)
+        self.assertEqual(refresh.call_count, 1)
+        self.assertInSync()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.habit_logs.filter(habit=self.habits[3]).delete()
+        self.assertInSync()
+
+    def test_rolled_back_refresh_is_not_remembered(self):
+        entry = DailyEntry.objects.get(date=date(2024, 1, 3))
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                HabitLog.objects.create(entry=entry, habit=self.habits[3], completed=True)
+                raise RuntimeError
+            # Another callback already queued must not hide the stale entry
+            transaction.on_commit(lambda: None)
+            HabitLog.objects.create(entry=entry, habit=self.habits[3], completed=True)
+        self.assertInSync()
+
+    def test_entry_create_move_and_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = DailyEntry.objects.create(date=date(2023, 12, 31))
+            HabitLog.objects.create(entry=entry, habit=self.habits[1], completed=True)
+        self.assertInSync()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.date = date(2024, 1, 5)
+            DailyEntry.objects.filter(date=date(2024, 1, 5)).delete()
+            entry.save()
+        self.assertInSync()
+
+        with self.count_refreshes() as refresh, self.captureOnCommitCallbacks(execute=True):
+            entry.delete()
+        self.assertEqual(refresh.call_count, 1)
+        self.assertInSync()
+
+    def test_weight_change_rebuilds(self):
+        class InlineThread:
+            def __init__(self, target, args, **kwargs):
+                self.start = lambda: target(*args)
+
+        habit = self.habits[1]
+        habit.positive_score = 7
+        # Run the background rebuild inline; it closes its connection, which TestCase can't allow
+        with mock.patch("monitor.signals.threading.Thread", InlineThread), \
+                mock.patch("monitor.signals.connections"):
+            with self.captureOnCommitCallbacks(execute=True):
+                habit.save()
+        self.assertInSync()
+
+    def test_rebuild_command(self):
+        out = open(os.devnull, "w")
+        DailyScore.objects.all().delete()
+        with self.assertRaises(SystemExit):
+            call_command("rebuild_daily_scores", "--verify", stdout=out, stderr=out)
+        call_command("rebuild_daily_scores", stdout=out)
+        call_command("rebuild_daily_scores", "--verify", stdout=out)
+        self.assertInSync()
+
+
+class DailyReviewTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.habits = seed_journal(days=5)
+        self.client.force_login(User.objects.create_user("review", password="review"))
+        self.today = timezone.now().date()
+
+    def submit(self, done, day=None, **fields):
+        data = {"loved_someone": "", "daily_summary": "", **fields}
+        data.update({f"habit_{habit.pk}": "on" for habit in done})
+        url = reverse("input") + (f"?date={day.isoformat()}" if day else "")
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, data)
+
+    def test_resubmitting_a_day_updates_it_in_place(self):
+        self.assertRedirects(self.submit([self.habits[0]], daily_summary="First"), reverse("home"))
+        entry = DailyEntry.objects.get(date=self.today)
+        self.submit([self.habits[1]], daily_summary="Second", loved_someone=" Ann ")
+        self.assertEqual(DailyEntry.objects.filter(date=self.today).count(), 1)
+        entry.refresh_from_db()
+        self.assertEqual((entry.daily_summary, entry.loved_key), ("Second", "ann"))
+        self.assertEqual(
+            sorted(entry.habit_logs.values_list("habit__name", "completed")),
+            [("Doomscroll", False), ("Gym", True), ("Read", False), ("Unused", False)],
+        )
+        self.assertEqual(scoring.materialized_scores(), scoring.daily_scores())
+        self.assertEqual(DailyScore.objects.get(date=self.today).day_score, 3)
+
+    def test_invalid_submission_keeps_ticked_habits(self):
+        response = self.submit([self.habits[1]], loved_someone="x" * 101)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors)
+        self.assertEqual(response.context["completed_ids"], {self.habits[1].pk})
+        self.assertFalse(DailyEntry.objects.filter(date=self.today).exists())
+
+    def test_write_is_two_statements_however_often_saved(self):
+        for _ in range(3):
+            with CaptureQueriesContext(connection) as queries:
+                journal.save_day(self.today, self.habits, {self.habits[0].pk})
+            writes = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("INSERT")]
+            self.assertEqual(len(writes), 2)
+            self.assertTrue(all("ON CONFLICT" in sql for sql in writes))
+        self.assertEqual(HabitLog.objects.filter(entry__date=self.today).count(), len(self.habits))
+
+    def test_write_is_atomic(self):
+        # Fails after both statements ran
+        with mock.patch.object(journal.signals, "schedule_refresh", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                journal.save_day(self.today, self.habits, set(), daily_summary="Lost")
+        self.assertFalse(DailyEntry.objects.filter(date=self.today).exists())
+
+    def test_edit_an_earlier_day(self):
+        day = date(2024, 1, 2)
+        page = self.client.get(reverse("input"), {"date": day.isoformat()})
+        self.assertEqual(page.context["current_date"], day)
+        self.assertEqual(page.context["completed_ids"], set(
+            HabitLog.objects.filter(entry__date=day, completed=True).values_list("habit_id", flat=True)
+        ))
+        with self.captureOnCommitCallbacks(execute=True):
+            HabitLog.objects.create(entry=DailyEntry.objects.get(date=day), habit=self.habits[3], completed=True)
+            self.habits[3].is_active = False
+            self.habits[3].save()
+        self.submit([self.habits[2]], day=day, loved_someone="Bob")
+        logs = dict(HabitLog.objects.filter(entry__date=day).values_list("habit__name", "completed"))
+        self.assertEqual(logs, {"Read": False, "Gym": False, "Doomscroll": True, "Unused": True})
+        self.assertEqual(DailyEntry.objects.get(date=day).loved_someone, "Bob")
+        self.assertEqual(scoring.materialized_scores(), scoring.daily_scores())
+        self.assertEqual(self.client.get(reverse("input"), {"date": "2999-01-01"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("input"), {"date": "soon"}).status_code, 400)
+
+
+class QuoteRankingTests(TestCase):
+    def setUp(self):
+        self.quotes = [Quote.objects.create(text=f"Quote {i}", order=ranking.next_rank(Quote)) for i in range(5)]
+
+    def ordered(self):
+        return list(Quote.objects.order_by("order").values_list("text", flat=True))
+
+    def updates(self, queries):
+        return [q["sql"] for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+
+    def test_new_quotes_go_last_gap_apart(self):
+        self.assertEqual([q.order for q in self.quotes], [ranking.GAP * i for i in range(1, 6)])
+
+    def test_move_writes_one_row(self):
+        first, second, third, fourth, fifth = self.quotes
+        with CaptureQueriesContext(connection) as queries:
+            ranking.move(Quote, fifth.pk, before=first.pk, after=second.pk)
+        self.assertEqual(len(self.updates(queries)), 1)
+        ranking.move(Quote, first.pk, after=fifth.pk)
+        ranking.move(Quote, second.pk, before=fourth.pk)
+        self.assertEqual(self.ordered(), ["Quote 0", "Quote 4", "Quote 2", "Quote 3", "Quote 1"])
+
+    def test_single_neighbour_uses_the_adjacent_row(self):
+        first, second, third, fourth, fifth = self.quotes
+        # Right before the second quote, not GAP below it onto the first one's rank
+        rank = ranking.move(Quote, fifth.pk, after=second.pk)
+        self.assertEqual(rank, (first.order + second.order) // 2)
+        ranking.move(Quote, first.pk, before=third.pk)
+        self.assertEqual(self.ordered(), ["Quote 4", "Quote 1", "Quote 2", "Quote 0", "Quote 3"])
+        self.assertEqual(len(set(Quote.objects.values_list("order", flat=True))), 5)
+
+    def test_dense_ranks_rebalance(self):
+        first = self.quotes[0]
+        with CaptureQueriesContext(connection) as queries:
+            # Each move halves the gap after the first quote: the 1024 gap is used up by the 11th
+            for _ in range(12):
+                ids = list(Quote.objects.order_by("order").values_list("pk", flat=True))
+                ranking.move(Quote, ids[-1], before=first.pk, after=ids[1])
+        rebalances = [sql for sql in self.updates(queries) if "CASE" in sql]
+        self.assertEqual(len(rebalances), 1)
+        self.assertEqual(len(self.updates(queries)), 13)
+        # 12 rotations of the last four quotes
+        self.assertEqual(self.ordered(), [f"Quote {i}" for i in range(5)])
+        self.assertEqual(ranking.rebalance(Quote), 5)
+        self.assertEqual(
+            list(Quote.objects.order_by("order").values_list("order", flat=True)), [ranking.GAP * i for i in range(1, 6)]
+        )
+
+    def test_bulk_reorder_is_one_update(self):
+        ids = [q.pk for q in reversed(self.quotes)]
+        with CaptureQueriesContext(connection) as queries:
+            ranking.reorder(Quote, ids)
+        self.assertEqual(len(self.updates(queries)), 1)
+        self.assertEqual(self.ordered(), [f"Quote {i}" for i in range(4, -1, -1)])
+
+    def test_api(self):
+        self.client.force_login(User.objects.create_user("ranks", password="ranks"))
+        url = reverse("move_quote")
+        first, second, third = self.quotes[:3]
+        move = lambda **data: self.client.post(url, json.dumps(data), content_type="application/json")
+        self.assertEqual(move(id=str(third.pk), before=str(first.pk), after=str(second.pk)).status_code, 200)
+        self.assertEqual(self.ordered()[:3], ["Quote 0", "Quote 2", "Quote 1"])
+        self.assertEqual(move(id=third.pk, before=second.pk, after=first.pk).status_code, 409)
+        self.assertEqual(move(id=9999, before=None, after=first.pk).status_code, 404)
+        self.assertEqual(move(before=first.pk).status_code, 400)
+        response = self.client.post(reverse("reorder_quotes"), json.dumps({"order": [q.pk for q in self.quotes[::-1]]}), content_type="application/json")
+        self.assertTrue(response.json()["success"])
+        self.assertEqual(self.ordered()[0], "Quote 4")
+
+
+class CalendarTaskApiTests(TestCase):
+    def setUp(self):
+        CalendarTask.objects.bulk_create([
+            CalendarTask(date=date(2024, 1, 1) + timedelta(days=d // 3), name=f"Task {d}",
+                         task_type=["normal", "day"][d % 2], priority=["high", "important", "medium"][d % 3])
+            for d in range(120)
+        ])
+        self.url = "/api/calendar-tasks/"
+
+    def test_filters(self):
+        january = self.client.get(self.url, {"month": 1, "year": 2024}).json()
+        self.assertEqual(len(january), 93)
+        self.assertTrue(all(t["date"].startswith("2024-01") for t in january))
+        self.assertEqual([t["date"] for t in january], sorted(t["date"] for t in january))
+        days = self.client.get(self.url, {"start": "2024-02-01", "end": "2024-02-03", "task_type": "day"}).json()
+        self.assertEqual({(t["date"], t["task_type"]) for t in days}, {(f"2024-02-0{d}", "day") for d in (1, 2, 3)})
+        high = self.client.get(self.url, {"date": "2024-01-05", "priority": ["high", "medium"]}).json()
+        self.assertEqual(sorted(t["priority"] for t in high), ["high", "medium"])
+        self.assertEqual(len(self.client.get(self.url).json()), 120)
+        for bad in ({"month": 1}, {"month": "x", "year": 2024}, {"month": 13, "year": 2024}, {"start": "yesterday"},
+                    {"month": 1, "year": 10 ** 30}):
+            self.assertEqual(self.client.get(self.url, bad).status_code, 400, bad)
+
+    def test_keyset_pages(self):
+        seen, url, params = [], self.url, {"page_size": 25}
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                page = self.client.get(url, params).json()
+            self.assertEqual(len([q for q in queries.captured_queries if "monitor_calendartask\"" in q["sql"] and "tableversion" not in q["sql"]]), 1)
+            seen += [t["id"] for t in page["results"]]
+            url, params = page["next"], None
+        self.assertEqual(seen, list(CalendarTask.objects.order_by("date", "id").values_list("id", flat=True)))
+        self.assertEqual(self.client.get(self.url, {"cursor": "nope"}).status_code, 400)
+
+    def test_conditional_get(self):
+        params = {"month": 1, "year": 2024}
+        first = self.client.get(self.url, params)
+        etag = first["ETag"]
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Any write, even one bypassing the ORM, changes the version
+        CalendarTask.objects.filter(name="Task 0").update(priority="medium")
+        changed = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        # A matching ETag never turns a malformed request into a 304
+        for bad in ({"month": 13, "year": 2024}, {"cursor": "nope"}, {"page_size": "x"}):
+            self.assertEqual(self.client.get(self.url, bad, HTTP_IF_NONE_MATCH=changed["ETag"]).status_code, 400, bad)
+
+
+class CalendarSummaryTests(TestCase):
+    def setUp(self):
+        for day, task_type, priority in [
+            (date(2023, 12, 31), "day", "high"),
+            (date(2024, 1, 3), "normal", "high"),
+            (date(2024, 1, 3), "normal", "important"),
+            (date(2024, 1, 3), "day", "important"),
+            (date(2024, 2, 29), "day", "medium"),
+            (date(2024, 4, 1), "normal", "high"),
+        ]:
+            CalendarTask.objects.create(date=day, name="Task", task_type=task_type, priority=priority)
+        self.client.force_login(User.objects.create_user("summary", password="summary"))
+        self.url = reverse("calendar_summary_api")
+
+    def test_month_window(self):
+        self.assertEqual(calendar_tasks.month_window(2024, 1), (date(2024, 1, 1), date(2024, 1, 31)))
+        self.assertEqual(calendar_tasks.month_window(2023, 12, 3), (date(2023, 12, 1), date(2024, 2, 29)))
+
+    def test_counts_per_day_in_one_query(self):
+        with self.assertNumQueries(1):
+            days = calendar_tasks.month_summary(date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual(days, {"2024-01-03": {
+            "total": 3, "task_type": {"day": 1, "normal": 2}, "priority": {"high": 1, "important": 2},
+        }})
+        sql, params = (
+            CalendarTask.objects.filter(date__range=(date(2024, 1, 1), date(2024, 1, 31)))
+            .values_list("date", "task_type", "priority").annotate(n=Count("id")).query.sql_with_params()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            self.assertIn("COVERING INDEX monitor_task_date_type", " ".join(row[-1] for row in cursor.fetchall()))
+
+    def test_api(self):
+        data = self.client.get(self.url, {"year": 2023, "month": 12, "months": 3}).json()
+        self.assertEqual((data["start"], data["end"]), ("2023-12-01", "2024-02-29"))
+        self.assertEqual(sorted(data["days"]), ["2023-12-31", "2024-01-03", "2024-02-29"])
+        response = self.client.get(self.url, {"year": 2024, "month": 4})
+        self.assertEqual(list(response.json()["days"]), ["2024-04-01"])
+        self.assertEqual(self.client.get(self.url, {"year": 2024, "month": 4}, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        for bad in ({"months": 0}, {"months": 13}, {"month": 13}, {"year": "x"}, {"year": 10 ** 30}):
+            self.assertEqual(self.client.get(self.url, bad).status_code, 400, bad)
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN every query of the hot pages; none may scan a whole table."""
+    # Tables of a handful of rows, where a scan is the right plan
+    SMALL_TABLES = {"monitor_habit", "monitor_datastamp"}
+
+    def setUp(self):
+        seed_journal()
+        CalendarTask.objects.create(date=date(2024, 1, 3), name="Dentist", task_type="normal")
+        reset_response_cache()
+        self.client.force_login(User.objects.create_user("plans", password="plans"))
+
+    def full_scans(self, queries):
+        with connection.cursor() as cursor:
+            for sql in queries:
+                if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                    continue
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                for *_, detail in cursor.fetchall():
+                    if detail.startswith("SCAN ") and "INDEX" not in detail and detail.split()[1] not in self.SMALL_TABLES:
+                        yield detail, sql
+
+    def assertNoFullScan(self, url, params, streaming=False):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+            if streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries.captured_queries)
+        self.assertEqual(list(self.full_scans(q["sql"] for q in queries.captured_queries)), [])
+
+    def test_view_data(self):
+        self.assertNoFullScan(reverse("view_data"), {"month": 1, "year": 2024})
+
+    def test_chart_view(self):
+        self.assertNoFullScan(reverse("chart"), {"start": "2024-01-01", "end": "2024-01-31"})
+
+    def test_load_tasks(self):
+        self.assertNoFullScan(reverse("load-tasks"), {"date": "2024-01-03"})
+
+    def test_export(self):
+        self.assertNoFullScan(reverse("download_excel"), {"format": "csv", "start": "2024-01-01", "end": "2024-01-31"}, streaming=True)
+
+
+class EntryConstraintMigrationTests(TransactionTestCase):
+    before = [("monitor", "0007_search_index")]
+    after = [("monitor", "0008_entry_log_constraints")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicate_days_are_merged(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        Habit, DailyEntry, HabitLog = (apps.get_model("monitor", name) for name in ("Habit", "DailyEntry", "HabitLog"))
+        read, gym = Habit.objects.create(name="Read", positive_score=2), Habit.objects.create(name="Gym", positive_score=3)
+        first = DailyEntry.objects.create(date=date(2024, 1, 1), daily_summary="Morning run", loved_someone="Ann")
+        HabitLog.objects.create(entry=first, habit=read, completed=True)
+        HabitLog.objects.create(entry=first, habit=gym, completed=True)
+        latest = DailyEntry.objects.create(date=date(2024, 1, 1), loved_someone="Bob")
+        HabitLog.objects.create(entry=latest, habit=read, completed=False)
+        HabitLog.objects.create(entry=latest, habit=read, completed=False)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        entry = apps.get_model("monitor", "DailyEntry").objects.get()
+        self.assertEqual((entry.pk, entry.daily_summary, entry.loved_someone), (latest.pk, "Morning run", "Bob"))
+        logs = apps.get_model("monitor", "HabitLog").objects.filter(entry=entry)
+        self.assertEqual(sorted(logs.values_list("habit_id", "completed")), [(read.pk, False), (gym.pk, True)])
+        score = apps.get_model("monitor", "DailyScore").objects.get()
+        self.assertEqual((score.day_score, score.completed_count), (3, 1))
+
+    def triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            return {name for name, in cursor.fetchall()}
+
+    def test_table_rebuilds_keep_triggers(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        expected = self.triggers()
+        self.assertIn("monitor_habitlog_stamp_insert", expected)
+        self.assertIn("monitor_dailyentry_fts_update", expected)
+        for target in (self.after, self.before):
+            executor = MigrationExecutor(connection)
+            executor.migrate(target)
+            self.assertEqual(self.triggers(), expected, target)
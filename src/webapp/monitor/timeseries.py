@@ -0,0 +1,87 @@
+"""
+Journal time series bucketed by day, ISO week, month or year.
+
+SQLite does the bucketing (strftime) and the aggregation in one GROUP BY,
+and the result is returned as parallel arrays, one per measure.
+
+%G/%V (ISO year/week) only exist in SQLite 3.46+, so ISO weeks are derived
+from the Thursday of each date's week, which by definition falls in the
+week's ISO year; its day of year gives the week number.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import DailyEntry, Habit, HabitLog
+
+_THURSDAY = "date(e.date, '-' || ((CAST(strftime('%w', e.date) AS INTEGER) + 6) % 7) || ' days', '+3 days')"
+
+BUCKETS = {
+    "day": "strftime('%Y-%m-%d', e.date)",
+    # %% because Django's sqlite cursor turns %s into a placeholder
+    "week": f"printf('%%s-W%%02d', strftime('%Y', {_THURSDAY}), "
+            f"(CAST(strftime('%j', {_THURSDAY}) AS INTEGER) - 1) / 7 + 1)",
+    "month": "strftime('%Y-%m', e.date)",
+    "year": "strftime('%Y', e.date)",
+}
+
+_TIMESERIES_SQL = """
+SELECT {bucket} AS bucket,
+       COUNT(DISTINCT e.id),
+       COALESCE(SUM(CASE WHEN l.completed THEN h.positive_score + h.negative_score END), 0),
+       COUNT(DISTINCT CASE WHEN trim(e.loved_someone) != '' THEN e.id END)
+       {habit_columns}
+FROM {entry} e
+LEFT JOIN {log} l ON l.entry_id = e.id
+LEFT JOIN {habit} h ON h.id = l.habit_id
+{where}
+GROUP BY bucket
+ORDER BY bucket
+"""
+
+
+def timeseries(resolution="day", start=None, end=None, habits=None, using=DEFAULT_DB_ALIAS):
+    """
+    Columnar series: bucket labels, entries (days logged), score (Life Score
+    of all habits), loved (days with someone loved) and, per habit in
+    `habits` (default: all), the number of days it was completed.
+    Raises ValueError for an unknown resolution.
+    """
+    if resolution not in BUCKETS:
+        raise ValueError(f"Unknown resolution '{resolution}'")
+    connection = connections[using]
+    habits = list(Habit.objects.using(using).all() if habits is None else habits)
+
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("e.date >= %s")
+        params.append(connection.ops.adapt_datefield_value(start))
+    if end is not None:
+        conditions.append("e.date <= %s")
+        params.append(connection.ops.adapt_datefield_value(end))
+    habit_columns = "".join(
+        f",\n       COUNT(DISTINCT CASE WHEN l.completed AND l.habit_id = {int(h.pk)} THEN e.id END)" for h in habits
+    )
+    sql = _TIMESERIES_SQL.format(
+        bucket=BUCKETS[resolution],
+        habit_columns=habit_columns,
+        entry=DailyEntry._meta.db_table,
+        log=HabitLog._meta.db_table,
+        habit=Habit._meta.db_table,
+        where=("WHERE " + " AND ".join(conditions)) if conditions else "",
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    columns = list(zip(*rows)) or [()] * (4 + len(habits))
+    return {
+        "resolution": resolution,
+        "buckets": list(columns[0]),
+        "entries": list(columns[1]),
+        "score": list(columns[2]),
+        "loved": list(columns[3]),
+        "habits": {
+            "ids": [h.pk for h in habits],
+            "names": [h.name for h in habits],
+            "completed": [list(c) for c in columns[4:]],
+        },
+    }
@@ -16,13 +16,19 @@ urlpatterns = [
     path('setup-database/', views.setup_database_view, name='setup_database'),
     # Settings (Handles DB switching/creation now)
     path('settings/', views.settings_view, name='settings'),
+    path('api/database-status/', views.database_status_api, name='database_status_api'),
     
     path('input/', views.input_view, name='input'),
     path('chart/', views.chart_view, name='chart'),
+    path('api/life-score/', views.life_score_api, name='life_score_api'),
     path('calendar/', views.calendar_view, name='calendar'),
     path('plan-ideas/', views.plan_ideas, name='plan_ideas'),
     path('view-data/', views.view_data, name='view_data'),
     path('download_excel/', views.export_to_excel_view, name='download_excel'),
+    path('api/habit-streaks/', views.habit_streaks_api, name='habit_streaks_api'),
+    path('api/timeseries/', views.timeseries_api, name='timeseries_api'),
+    path('api/people/', views.people_api, name='people_api'),
+    path('api/search/', views.search_api, name='search_api'),
     
     # Habit Management
     path('habits/', views.habit_list, name='habit_list'),
@@ -35,12 +41,14 @@ urlpatterns = [
     path('quotes/<int:pk>/edit/', views.quote_update_manage, name='quote_update_manage'),
     path('quotes/<int:pk>/delete/', views.quote_delete_manage, name='quote_delete_manage'),
     path('api/reorder-quotes/', views.reorder_quotes, name='reorder_quotes'),
+    path('api/move-quote/', views.move_quote, name='move_quote'),
 
     path('delete-quote/<int:id>/', views.delete_quote, name='delete_quote'),
     
     # API Routes
     path('api/', include(router.urls)),
     path('api/load-tasks/', views.load_tasks, name='load-tasks'),
+    path('api/calendar-summary/', views.calendar_summary_api, name='calendar_summary_api'),
     path('api/add-plan/', views.add_plan_api, name='add_plan_api'),
     path('api/add-branch/', views.add_branch_api, name='add_branch_api'),
     path('api/delete-plan/', views.delete_plan_api, name='delete_plan_api'),
@@ -1,17 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
-from django.db.models import Sum, Count, Q, Max
+from django.db.models import Sum, Count, Q
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import BadRequest
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import connections, DEFAULT_DB_ALIAS
-from django.core.management import call_command
-import openpyxl
 import json
+from functools import wraps
 import os
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -21,10 +20,18 @@ import calendar
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import AllowAny
 from .serializers import CalendarTaskSerializer, TodoTaskSerializer
+from .calendar_tasks import (
+    MAX_SUMMARY_MONTHS, ConditionalListMixin, KeysetPagination, filter_tasks, month_summary, month_window, table_conditional,
+)
+
+from user_monitoring.db_registry import registry as db_registry
+from user_monitoring.db_upload import UploadRejected, receive_database_upload
+from user_monitoring.response_cache import data_cached
 
 # Models and Forms
-from .models import Quote, CalendarTask, TodoTask, Plan, Branch, Habit, DailyEntry, HabitLog
+from .models import Quote, CalendarTask, TodoTask, Plan, Branch, Habit, DailyEntry
 from .forms import QuoteForm, PlanForm, BranchForm, HabitForm, DailyEntryForm
+from . import export, journal, people, pivot, ranking, scoring, search, streaks, timeseries
 
 # monitor/views.py
 
@@ -59,6 +66,8 @@ def login_view(request):
             return redirect('home')
         else:
             messages.error(request, 'Invalid username or password')
+    elif db_registry.is_switching():
+        messages.info(request, 'Preparing the selected database...')
     return render(request, 'monitor/login.html')
 
 def logout_view(request):
@@ -96,22 +105,16 @@ def settings_view(request):
             uploaded_file = request.FILES.get('db_file')
             
             if uploaded_file:
-                filename = uploaded_file.name
-                # Relaxed check for extension to avoid issues, but good to keep basics
-                if not (filename.endswith('.sqlite3') or filename.endswith('.db')):
-                    messages.error(request, "Invalid file type. Please select .sqlite3 or .db")
-                    return redirect('settings')
-                
-                new_db_path = db_folder / filename
-                
-                # Save file
+                # Stream to a temp file, validate, then install atomically
                 try:
-                    with open(new_db_path, 'wb+') as destination:
-                        for chunk in uploaded_file.chunks():
-                            destination.write(chunk)
+                    upload = receive_database_upload(uploaded_file, db_folder)
+                except UploadRejected as e:
+                    messages.error(request, str(e))
+                    return redirect('settings')
                 except Exception as e:
                     messages.error(request, f"Error saving file: {e}")
                     return redirect('settings')
+                new_db_path = upload.path
 
                 # Switch Config
                 # We pass 'base_storage' so the config file handles Android paths correctly
@@ -159,6 +162,9 @@ def settings_view(request):
             if password != confirm:
                 messages.error(request, "Passwords do not match.")
                 setup_required = True # Keep modal open
+            elif db_registry.is_switching():
+                messages.error(request, "The new database is still being prepared.")
+                setup_required = True
             else:
                 try:
                     User.objects.create_user(username=username, password=password)
@@ -189,38 +195,26 @@ def settings_view(request):
     return render(request, 'monitor/settings.html', {
         'account_exists': account_exists,
         'current_db_path': current_db_path,
-        'setup_required': setup_required
+        'setup_required': setup_required,
+        'switch_status': db_registry.status,
     })
 
 # --- Helper Functions ---
 
 def _switch_db_connection(request, new_db_path, base_storage=settings.BASE_DIR):
-    """Updates persistence, settings, closes connections, and migrates."""
-    
-    # [ANDROID FIX] Save db_config.json to the writable path, not read-only source
-    config_path = base_storage / 'db_config.json'
-    
-    config_data = {'db_path': str(new_db_path.resolve())}
-    
-    try:
-        # Persist
-        with open(config_path, 'w') as f:
-            json.dump(config_data, f)
-            
-        # Switch Runtime
-        old_db_name = settings.DATABASES['default']['NAME']
-        settings.DATABASES['default']['NAME'] = new_db_path
-        connections[DEFAULT_DB_ALIAS].close()
-        
-        # Migrate
-        call_command('migrate', interactive=False)
-        return True
-        
-    except Exception as e:
-        # Revert
-        # settings.DATABASES['default']['NAME'] = old_db_name # (Optional revert logic)
-        messages.error(request, f"Database switch failed: {e}")
+    """
+    Starts migrating the new file in the background; 'default' is repointed
+    for all threads once it is ready (see user_monitoring.db_registry).
+    """
+    # [ANDROID FIX] db_config.json is written to the writable path, not read-only source
+    if not db_registry.switch_to(new_db_path, base_storage):
+        messages.error(request, "Another database switch is still in progress.")
         return False
+    return True
+
+def database_status_api(request):
+    """Progress of the background database switch (polled by settings.html)."""
+    return JsonResponse(db_registry.status)
 
 def _handle_profile_update(request):
     new_username = request.POST.get('username')
@@ -291,8 +285,7 @@ def home_view(request):
     if request.method == "POST":
         form = QuoteForm(request.POST)
         if form.is_valid():
-            last_order = Quote.objects.aggregate(max_order=Max('order'))['max_order']
-            form.instance.order = (last_order or 0) + 1
+            form.instance.order = ranking.next_rank(Quote)
             form.save()
             return redirect('home')
     return render(request, 'monitor/home.html', {'quotes': quotes, 'form': form})
@@ -352,8 +345,7 @@ def quote_create_manage(request):
     if request.method == 'POST':
         form = QuoteForm(request.POST)
         if form.is_valid():
-            last_order = Quote.objects.aggregate(max_order=Max('order'))['max_order']
-            form.instance.order = (last_order or 0) + 1
+            form.instance.order = ranking.next_rank(Quote)
             form.save()
             return redirect('habit_list')
     return redirect('habit_list')
@@ -383,84 +375,120 @@ def reorder_quotes(request):
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
-            for index, quote_id in enumerate(data.get('order', [])):
-                Quote.objects.filter(id=quote_id).update(order=index)
+            ranking.reorder(Quote, [int(id) for id in data.get('order', [])])
             return JsonResponse({'success': True})
         except Exception as e: return JsonResponse({'success': False, 'error': str(e)})
     return JsonResponse({'success': False})
 
+@login_required
+@csrf_exempt
+def move_quote(request):
+    """POST {"id", "before", "after"}: put the quote between two neighbours (null = top/end) by rewriting its rank only."""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    try:
+        data = json.loads(request.body)
+        before, after = (None if data.get(k) is None else int(data[k]) for k in ('before', 'after'))
+        rank = ranking.move(Quote, int(data['id']), before, after)
+    except Quote.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Quote not found'}, status=404)
+    except ranking.StaleOrder as e:
+        # The page's list is out of date: the client falls back to a full reorder
+        return JsonResponse({'success': False, 'error': str(e)}, status=409)
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Invalid payload'}, status=400)
+    return JsonResponse({'success': True, 'order': rank})
+
 @login_required
 def input_view(request):
-    active_habits = Habit.objects.filter(is_active=True).order_by('order')
-    current_date = timezone.now().date()
+    """Daily review for today, or for an earlier day with ?date=YYYY-MM-DD (see monitor/journal.py)."""
+    active_habits = list(Habit.objects.filter(is_active=True).order_by('order'))
+    today = timezone.now().date()
+    current_date = _date_param(request, 'date') or today
+    if current_date > today:
+        return HttpResponse('Cannot review a future day', status=400)
 
     if request.method == 'POST':
         form = DailyEntryForm(request.POST)
+        completed = {habit.id for habit in active_habits if request.POST.get(f"habit_{habit.id}") == 'on'}
         if form.is_valid():
-            daily_entry = form.save(commit=False)
-            daily_entry.date = current_date
-            daily_entry.save()
-
-            for habit in active_habits:
-                checkbox_name = f"habit_{habit.id}"
-                is_completed = request.POST.get(checkbox_name) == 'on'
-                HabitLog.objects.create(entry=daily_entry, habit=habit, completed=is_completed)
-            
+            journal.save_day(
+                current_date, active_habits, completed,
+                loved_someone=form.cleaned_data['loved_someone'],
+                daily_summary=form.cleaned_data['daily_summary'],
+            )
             return redirect('home')
+        # Re-render with the boxes the user ticked, not the saved ones
+        completed_ids = completed
     else:
-        form = DailyEntryForm()
+        entry = DailyEntry.objects.filter(date=current_date).first()
+        form = DailyEntryForm(instance=entry)
+        completed_ids = set(entry.habit_logs.filter(completed=True).values_list('habit_id', flat=True)) if entry else set()
 
     return render(request, 'monitor/input.html', {
         'form': form, 
         'habits': active_habits,
-        'current_date': current_date
+        'completed_ids': completed_ids,
+        'current_date': current_date,
+        'today': today,
     })
 
 @login_required
+@data_cached
 def chart_view(request):
-    entries = DailyEntry.objects.all().order_by('date')
-    line_labels = []
-    cumulative_scores = []
-    current_total = 0
-
-    for entry in entries:
-        line_labels.append(entry.date.strftime('%Y-%m-%d'))
-        day_score = 0
-        logs = entry.habit_logs.all()
-        
-        for log in logs:
-            if log.completed:
-                day_score += log.habit.positive_score + log.habit.negative_score
-        
-        current_total += day_score
-        cumulative_scores.append(current_total)
-
-    line_chart_data = {
-        'labels': line_labels,
-        'cumulative_score': cumulative_scores
-    }
-
-    all_habits = Habit.objects.all()
-    bar_labels = []
-    bar_values = []
-
-    for habit in all_habits:
-        bar_labels.append(habit.name)
-        checked_logs_count = HabitLog.objects.filter(habit=habit, completed=True).count()
-        total_impact = checked_logs_count * (habit.positive_score + habit.negative_score)
-        bar_values.append(total_impact)
-
-    bar_chart_data = {
-        'labels': bar_labels,
-        'values': bar_values
-    }
-
+    # Both charts are aggregated by SQLite (see monitor/scoring.py)
+    start, end = _date_param(request, 'start'), _date_param(request, 'end')
+    try:
+        max_points = _max_points(request)
+    except ValueError:
+        max_points = scoring.DEFAULT_MAX_POINTS
     return render(request, 'monitor/chart.html', {
-        'line_chart_data': line_chart_data,
-        'bar_chart_data': bar_chart_data,
+        'line_chart_data': scoring.line_chart_data(start, end, max_points),
+        'bar_chart_data': scoring.bar_chart_data(),
+        'max_points': max_points,
     })
 
+def _date_param(request, name):
+    """?<name>=YYYY-MM-DD as a date, None when absent; a malformed value is a 400."""
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise BadRequest(f"Invalid {name}: expected YYYY-MM-DD")
+
+def json_errors(view):
+    """Answer a BadRequest (e.g. from _date_param) with the APIs' {'error': ...} JSON."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
+    return wrapper
+
+def _max_points(request):
+    """?max_points= for the line chart. Raises ValueError."""
+    max_points = int(request.GET.get('max_points', scoring.DEFAULT_MAX_POINTS))
+    if max_points < 0:
+        raise ValueError("max_points must be >= 0")
+    return max_points
+
 @login_required
+@data_cached
+@json_errors
+def life_score_api(request):
+    """Line chart data; the chart's zoom asks for a narrower window at full resolution."""
+    start, end = _date_param(request, 'start'), _date_param(request, 'end')
+    try:
+        max_points = _max_points(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid max_points'}, status=400)
+    return JsonResponse(scoring.line_chart_data(start, end, max_points))
+
+@login_required
+@data_cached
 def view_data(request):
     today = timezone.now().date()
     selected_month = int(request.GET.get('month', today.month))
@@ -481,24 +509,12 @@ def view_data(request):
         display_habits = all_habits
         selected_habit_ids = [h.id for h in all_habits]
 
-    habit_data = []
-    for entry in entries:
-        day_data = {'date': entry.date.strftime('%Y-%m-%d')}
-        for habit in display_habits:
-            log = entry.habit_logs.filter(habit=habit).first()
-            day_data[habit.name] = 1 if (log and log.completed) else 0
-        habit_data.append(day_data)
-
-    loved_counts = {}
-    for entry in entries:
-        if entry.loved_someone:
-            name = entry.loved_someone.lower().strip()
-            if name:
-                loved_counts[name] = loved_counts.get(name, 0) + 1
-    
-    sorted_loved = sorted(loved_counts.items(), key=lambda item: item[1], reverse=True)
-    loved_labels = [item[0].title() for item in sorted_loved]
-    loved_values = [item[1] for item in sorted_loved]
+    display_habits = list(display_habits)
+    habit_data = pivot.matrix_records(display_habits, pivot.habit_matrix(display_habits, start_date, end_date))
+
+    top_loved = people.top_people(start_date, end_date)
+    loved_labels = [name for name, _ in top_loved]
+    loved_values = [days for _, days in top_loved]
 
     context = {
         'entries': entries,
@@ -517,36 +533,132 @@ def view_data(request):
     return render(request, 'monitor/view_data.html', context)
 
 @login_required
+@data_cached
+@json_errors
 def export_to_excel_view(request):
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    sheet.title = "User Inputs"
-    habits = list(Habit.objects.all().order_by('order'))
-    headers = ['Date'] + [h.name for h in habits] + ['Loved Someone', 'Daily Summary']
-    sheet.append(headers)
-    entries = DailyEntry.objects.all().order_by('date')
-    for entry in entries:
-        row = [entry.date.strftime('%Y-%m-%d')]
-        for habit in habits:
-            log = HabitLog.objects.filter(entry=entry, habit=habit).first()
-            row.append('Yes' if log and log.completed else 'No')
-        row.extend([entry.loved_someone, entry.daily_summary])
-        sheet.append(row)
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="user_inputs.xlsx"'
-    workbook.save(response)
-    return response
+    """Journal export. ?format=xlsx|csv|ndjson, optional ?start=/&end= (YYYY-MM-DD) and ?habits=<id>."""
+    fmt = request.GET.get('format', 'xlsx')
+    if fmt not in export.FORMATS:
+        return JsonResponse({'error': f"Unknown format '{fmt}'"}, status=400)
+    start, end = _date_param(request, 'start'), _date_param(request, 'end')
+    try:
+        habit_ids = [int(id) for id in request.GET.getlist('habits')]
+    except ValueError:
+        return JsonResponse({'error': 'Invalid habit filter'}, status=400)
+
+    habits = Habit.objects.all().order_by('order')
+    if habit_ids:
+        habits = habits.filter(id__in=habit_ids)
+    return export.export_response(fmt, habits, start, end)
+
+@login_required
+@data_cached
+@json_errors
+def habit_streaks_api(request):
+    """Current/longest streak and 7/30/90-day completion rates per habit. Optional ?end=YYYY-MM-DD."""
+    end = _date_param(request, 'end')
+    results = streaks.habit_streaks(end)
+    return JsonResponse({'habits': [{
+        'id': s.habit.id,
+        'name': s.habit.name,
+        'current_streak': s.current,
+        'longest_streak': s.longest,
+        'completion_rates': {str(days): value for days, value in s.rates.items()},
+    } for s in results]})
+
+@login_required
+@data_cached
+@json_errors
+def timeseries_api(request):
+    """
+    ?resolution=day|week|month|year, optional ?start=/&end= (YYYY-MM-DD) and ?habits=<id>.
+    Columnar JSON, see monitor/timeseries.py.
+    """
+    start, end = _date_param(request, 'start'), _date_param(request, 'end')
+    try:
+        habit_ids = [int(id) for id in request.GET.getlist('habits')]
+    except ValueError:
+        return JsonResponse({'error': 'Invalid habit filter'}, status=400)
+    habits = Habit.objects.filter(id__in=habit_ids) if habit_ids else None
+    try:
+        return JsonResponse(timeseries.timeseries(request.GET.get('resolution', 'day'), start, end, habits))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+@login_required
+@data_cached
+@json_errors
+def people_api(request):
+    """Top-N people by days loved. Optional ?start=/&end= (YYYY-MM-DD) and ?limit= (default 10, 0 = all)."""
+    start, end = _date_param(request, 'start'), _date_param(request, 'end')
+    try:
+        limit = int(request.GET.get('limit', 10))
+        if limit < 0:
+            raise ValueError("limit must be >= 0")
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    top = people.top_people(start, end, limit or None)
+    return JsonResponse({'names': [name for name, _ in top], 'days': [days for _, days in top]})
+
+@login_required
+def search_api(request):
+    """
+    Ranked full-text search: ?q=<text>, optional ?kinds=entry|quote|plan|branch
+    (repeatable) and ?limit= (default 20, at most 100). See monitor/search.py.
+    Not @data_cached: quotes and plans are outside the data version.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    try:
+        results = search.search(request.GET.get('q', ''), request.GET.getlist('kinds'), limit)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': results})
 
 @login_required
 def calendar_view(request): return render(request, 'monitor/calendar.html')
 @login_required
 def plan_ideas(request): return render(request, 'monitor/plan_ideas.html', {'plans': Plan.objects.all()})
-class CalendarTaskViewSet(ModelViewSet): permission_classes = [AllowAny]; queryset = CalendarTask.objects.all(); serializer_class = CalendarTaskSerializer
+class CalendarTaskViewSet(ConditionalListMixin, ModelViewSet):
+    """Lists take ?month=&year=, ?start=/&end=, ?date=, ?task_type=, ?priority= and ?page_size=/?cursor= (see monitor/calendar_tasks.py)."""
+    permission_classes = [AllowAny]; queryset = CalendarTask.objects.all(); serializer_class = CalendarTaskSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filter_tasks(queryset, self.request.query_params)
+        return queryset
+
 class TodoTaskViewSet(ModelViewSet): queryset = TodoTask.objects.all(); serializer_class = TodoTaskSerializer; permission_classes = [AllowAny]
+@login_required
+def calendar_summary_api(request):
+    """
+    Per-day task counts by type and priority for the calendar grid:
+    ?month=&year= (default: this month) and ?months= (1-12, default 1) to
+    prefetch the following months too. See monitor/calendar_tasks.py.
+    """
+    today = timezone.now().date()
+    try:
+        months = int(request.GET.get('months', 1))
+        if not 1 <= months <= MAX_SUMMARY_MONTHS:
+            raise ValueError
+        start, end = month_window(int(request.GET.get('year', today.year)), int(request.GET.get('month', today.month)), months)
+    except (ValueError, OverflowError):
+        return JsonResponse({'error': 'Invalid month, year or months'}, status=400)
+    return table_conditional(CalendarTask, request, lambda: JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': month_summary(start, end),
+    }))
+
 @csrf_exempt
+@json_errors
 def load_tasks(request):
-    try: date = datetime.strptime(request.GET.get('date'), '%Y-%m-%d').date()
-    except: return JsonResponse({'error': 'Invalid date'}, status=400)
+    date = _date_param(request, 'date')
+    if date is None: return JsonResponse({'error': 'Invalid date'}, status=400)
     return JsonResponse([{'id': t.id, 'name': t.name, 'task_type': t.task_type, 'priority': t.priority, 'date': t.date.strftime('%Y-%m-%d')} for t in CalendarTask.objects.filter(date=date)], safe=False)
 
 @login_required
@@ -0,0 +1,73 @@
+"""
+SQLite connection profiles.
+
+Applied to every new sqlite connection through the `connection_created`
+signal (wired in MonitorConfig.ready). Pick a preset with
+settings.SQLITE_PROFILE or the LIFEMONITOR_SQLITE_PROFILE env var.
+"""
+from django.conf import settings
+
+SQLITE_PROFILES = {
+    # Phones: small page cache and mmap window, WAL checkpointed often so the
+    # .sqlite3 file stays complete when users copy it off the device.
+    "android-low-memory": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "mmap_size": 32 * 1024 * 1024,
+        "cache_size": -8000,  # KiB
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 200,
+        "journal_size_limit": 4 * 1024 * 1024,
+    },
+    "desktop": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 1000,
+        "journal_size_limit": 16 * 1024 * 1024,
+    },
+    # SQLite defaults, for comparison in benchmarks
+    "stock": {},
+}
+
+# journal_mode is persistent in the file; the rest are per connection
+PRAGMA_ORDER = [
+    "busy_timeout", "journal_mode", "synchronous", "temp_store",
+    "mmap_size", "cache_size", "wal_autocheckpoint", "journal_size_limit",
+]
+
+
+def get_profile(name=None):
+    name = name or getattr(settings, "SQLITE_PROFILE", "desktop")
+    return SQLITE_PROFILES.get(name, SQLITE_PROFILES["desktop"])
+
+
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """connection_created receiver: run the profile's PRAGMAs on a fresh connection."""
+    if connection.vendor != "sqlite":
+        return
+    # Remember which file this connection points at, see close_stale_connections
+    connection.opened_db_name = str(connection.settings_dict["NAME"])
+    profile = get_profile()
+    with connection.cursor() as cursor:
+        for pragma in PRAGMA_ORDER:
+            if pragma in profile:
+                cursor.execute(f"PRAGMA {pragma} = {profile[pragma]}")
+
+
+def close_stale_connections(**kwargs):
+    """
+    request_started receiver. With persistent connections a worker thread may
+    still hold a connection to the previous database after a switch; drop it
+    so the request reconnects to the current file.
+    """
+    from django.db import connections
+
+    for conn in connections.all(initialized_only=True):
+        opened = getattr(conn, "opened_db_name", None)
+        if opened is not None and conn.connection is not None and opened != str(conn.settings_dict["NAME"]):
+            conn.close()
@@ -0,0 +1,128 @@
+"""
+Per-file database aliases and non-blocking database switching.
+
+Each SQLite file gets its own connection alias, so a new file can be
+migrated in a background thread while requests keep using the active one.
+Once it is ready, 'default' is repointed in one assignment: requests that
+already hold a connection finish against the old file, and
+close_stale_connections (db_profile) drops those connections at the start
+of the next request.
+"""
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import Signal
+
+from .schema import schema_is_current
+
+logger = logging.getLogger("LifeMonitor")
+
+# Sent after 'default' points at a new file. kwargs: path, previous
+database_switched = Signal()
+
+
+class _MigrateProgress:
+    """File-like sink for migrate's stdout that counts applied migrations."""
+
+    def __init__(self, status):
+        self.status = status
+
+    def write(self, text):
+        if "Applying " in text:
+            self.status["applied"] += 1
+
+    def flush(self):
+        pass
+
+
+class DatabaseRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._aliases = {}
+        self._thread = None
+        self.generation = 0
+        self.status = {"state": "idle"}
+
+    def alias_for(self, path):
+        """Connection alias bound to this SQLite file, registered on first use."""
+        path = str(Path(path).resolve())
+        with self._lock:
+            alias = self._aliases.get(path)
+            if alias is None:
+                alias = "sqlite_" + hashlib.sha1(path.encode()).hexdigest()[:10]
+                db = dict(settings.DATABASES[DEFAULT_DB_ALIAS])
+                db["NAME"] = path
+                # settings.DATABASES is the dict the ConnectionHandler reads
+                settings.DATABASES[alias] = db
+                self._aliases[path] = alias
+            return alias
+
+    def is_switching(self):
+        return self.status.get("state") == "migrating"
+
+    def switch_to(self, path, config_dir):
+        """
+        Prepare `path` in the background and make it the default database.
+        Returns False if another switch is still running.
+        """
+        with self._lock:
+            if self.is_switching():
+                return False
+            self.status = {"state": "migrating", "path": str(path), "applied": 0, "total": 0, "error": None}
+            self._thread = threading.Thread(
+                target=self._prepare_and_activate, args=(Path(path), Path(config_dir)), daemon=True
+            )
+        self._thread.start()
+        return True
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return not self.is_switching()
+
+    def _prepare_and_activate(self, path, config_dir):
+        alias = self.alias_for(path)
+        try:
+            self.prepare(alias)
+            self.activate(path, config_dir)
+            self.status["state"] = "ready"
+        except Exception as e:
+            logger.error(f"Database switch to {path} failed: {e}", exc_info=True)
+            self.status.update(state="error", error=str(e))
+        finally:
+            connections[alias].close()
+
+    def prepare(self, alias):
+        """Migrate the file behind `alias` if it is missing any migration."""
+        is_current, _ = schema_is_current(alias)
+        if is_current:
+            return
+        from django.db.migrations.executor import MigrationExecutor
+
+        executor = MigrationExecutor(connections[alias])
+        self.status["total"] = len(executor.migration_plan(executor.loader.graph.leaf_nodes()))
+        call_command("migrate", database=alias, interactive=False, stdout=_MigrateProgress(self.status))
+
+    def activate(self, path, config_dir):
+        """Persist the choice and repoint 'default' for every thread."""
+        path = Path(path).resolve()
+        with open(Path(config_dir) / "db_config.json", "w") as f:
+            json.dump({"db_path": str(path)}, f)
+
+        default = settings.DATABASES[DEFAULT_DB_ALIAS]
+        previous = default["NAME"]
+        # Shared by every thread's 'default' wrapper; new connections use the new file
+        default["NAME"] = path
+        self.generation += 1
+        logger.info(f"Database switched: {previous} -> {path}")
+        database_switched.send(sender=self.__class__, path=path, previous=previous)
+
+
+registry = DatabaseRegistry()
@@ -0,0 +1,105 @@
+"""
+Validated database uploads.
+
+The upload is streamed into a temporary file next to the other user
+databases while its SHA-256 is computed, checked for the SQLite header and
+`PRAGMA quick_check`, and only then renamed into place (os.replace is
+atomic on the same filesystem). A file that fails validation is deleted and
+the active database is never written to: an upload that carries the active
+file's name is installed under a new name instead.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger("LifeMonitor")
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+ALLOWED_EXTENSIONS = (".sqlite3", ".db")
+CHUNK_SIZE = 1024 * 1024
+
+UploadResult = namedtuple("UploadResult", "path sha256 size seconds")
+
+
+class UploadRejected(Exception):
+    pass
+
+
+def _validate_sqlite(path):
+    try:
+        # immutable: no locking and no -wal/-shm next to the temp file, even for WAL-mode databases
+        conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
+        try:
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+            conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise UploadRejected(f"File is not a readable SQLite database ({e}).")
+    if result != "ok":
+        raise UploadRejected(f"Database integrity check failed: {result}")
+
+
+def _install_path(db_folder, filename):
+    target = db_folder / filename
+    active = Path(settings.DATABASES["default"]["NAME"]).resolve()
+    if target.resolve() == active:
+        stem, ext = os.path.splitext(filename)
+        target = db_folder / f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
+    return target
+
+
+def receive_database_upload(uploaded_file, db_folder):
+    """Stream, validate and install an uploaded SQLite file. Raises UploadRejected."""
+    filename = Path(uploaded_file.name).name
+    if not filename.endswith(ALLOWED_EXTENSIONS):
+        raise UploadRejected("Invalid file type. Please select .sqlite3 or .db")
+
+    db_folder = Path(db_folder)
+    start = time.monotonic()
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=db_folder, prefix=".upload-", suffix=".part")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            for chunk in uploaded_file.chunks(CHUNK_SIZE):
+                if size == 0 and not chunk.startswith(SQLITE_HEADER):
+                    raise UploadRejected("File is not an SQLite database (bad header).")
+                digest.update(chunk)
+                size += len(chunk)
+                tmp.write(chunk)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        if size == 0:
+            raise UploadRejected("Uploaded file is empty.")
+
+        _validate_sqlite(tmp_path)
+
+        target = _install_path(db_folder, filename)
+        # Leftover WAL/SHM from an older file with this name would be replayed onto the new one
+        for suffix in ("-wal", "-shm", "-journal"):
+            Path(f"{target}{suffix}").unlink(missing_ok=True)
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        for suffix in ("-wal", "-shm", "-journal"):
+            Path(f"{tmp_path}{suffix}").unlink(missing_ok=True)
+
+    seconds = time.monotonic() - start
+    result = UploadResult(target, digest.hexdigest(), size, seconds)
+    logger.info(
+        f"Database upload installed: {target.name} {size / 1e6:.1f} MB in {seconds:.2f}s "
+        f"({size / 1e6 / max(seconds, 1e-6):.1f} MB/s) sha256={result.sha256[:12]}"
+    )
+    return result
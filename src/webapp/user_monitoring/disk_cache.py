@@ -0,0 +1,134 @@
+"""
+Disk-backed cache backend: one small SQLite file in the app's data directory.
+
+Unlike Django's DatabaseCache it does not use the user's journal database
+(which can be switched or replaced at any time) and needs no createcachetable.
+The file and table are created on first use; every thread keeps its own
+sqlite3 connection. Entries are culled oldest-write-first past MAX_ENTRIES.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    written REAL NOT NULL
+)
+"""
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = Path(location)
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _expires(self, timeout):
+        # get_backend_timeout already returns an absolute time (or None for "never")
+        return self.get_backend_timeout(timeout)
+
+    def _fetch(self, key):
+        row = self._conn().execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        return row
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        if self._fetch(key) is not None:
+            return False
+        self._write(key, value, timeout)
+        return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._fetch(key)
+        return default if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(self.make_and_validate_key(key, version=version), value, timeout)
+
+    def _write(self, key, value, timeout):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires, written) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(timeout), time.time()),
+        )
+        self._cull(conn)
+
+    def _cull(self, conn):
+        count = conn.execute("SELECT count(*) FROM cache").fetchone()[0]
+        if count > self._max_entries:
+            conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+            excess = conn.execute("SELECT count(*) FROM cache").fetchone()[0] - self._max_entries
+            if excess > 0:
+                # Like the other backends, cull a fraction rather than one entry per write
+                excess = max(excess, self._max_entries // self._cull_frequency)
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY written LIMIT ?)", (excess,)
+                )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._conn().execute(
+            "UPDATE cache SET expires = ? WHERE key = ?", (self._expires(timeout), key)
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._conn().execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        return self._fetch(self.make_and_validate_key(key, version=version)) is not None
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache")
+
+    # Prefix helpers, used to warm and prune whole namespaces (see response_cache.warm)
+
+    def get_prefix(self, prefix, version=None):
+        """{key: value} for every live entry whose key starts with `prefix`."""
+        full_prefix = self.make_key(prefix, version=version)
+        head = len(full_prefix) - len(prefix)
+        rows = self._conn().execute(
+            "SELECT key, value FROM cache WHERE substr(key, 1, ?) = ? AND (expires IS NULL OR expires > ?)",
+            (len(full_prefix), full_prefix, time.time()),
+        )
+        return {key[head:]: pickle.loads(value) for key, value in rows}
+
+    def delete_prefix(self, prefix, keep=None, version=None):
+        """Delete entries under `prefix`, except those under the `keep` prefix."""
+        full_prefix = self.make_key(prefix, version=version)
+        sql = "DELETE FROM cache WHERE substr(key, 1, ?) = ?"
+        params = [len(full_prefix), full_prefix]
+        if keep is not None:
+            full_keep = self.make_key(keep, version=version)
+            sql += " AND substr(key, 1, ?) != ?"
+            params += [len(full_keep), full_keep]
+        return self._conn().execute(sql, params).rowcount
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests; nothing to do per request
+        pass
@@ -1,27 +1,81 @@
 from django.shortcuts import redirect
 from django.conf import settings
+from django.db import connection
 from django.urls import reverse
 import os
+import threading
+import time
+
+
+class DatabasePresence:
+    """
+    Cached "does the active database file exist?".
+    A stat on Android shared storage goes through FUSE, so it runs once per
+    file and then only from a slow background poll. Database switch/creation
+    events call invalidate() (wired in MonitorConfig.ready).
+    """
+
+    def __init__(self, poll_interval=5.0):
+        self.poll_interval = poll_interval
+        self._name = None
+        self._present = False
+        self._watcher = None
+
+    def is_present(self):
+        name = settings.DATABASES['default']['NAME']
+        if name != self._name:
+            self._refresh(name)
+        return self._present
+
+    def invalidate(self, **kwargs):
+        self._name = None
+
+    def _refresh(self, name):
+        self._present = connection.creation.is_in_memory_db(name) or os.path.exists(name)
+        self._name = name
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="db-presence", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        # Notices the file disappearing (or reappearing) behind our back
+        while True:
+            time.sleep(self.poll_interval)
+            name = self._name
+            if name is not None and not connection.creation.is_in_memory_db(name):
+                self._present = os.path.exists(name)
+
+
+presence = DatabasePresence()
+
 
 class DatabaseCheckMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        self._setup_url = None
 
     def __call__(self, request):
-        # Define paths that should be accessible even without a DB
-        setup_url = reverse('setup_database')
+        start = time.perf_counter()
+
+        # Define paths that should be accessible even without a DB (resolved once)
+        if self._setup_url is None:
+            self._setup_url = reverse('setup_database')
         static_url = settings.STATIC_URL
-        
+
         # Allow access to setup page and static files
-        if request.path == setup_url or request.path.startswith(static_url):
+        if request.path == self._setup_url or request.path.startswith(static_url):
             return self.get_response(request)
 
-        # Check if the database file exists
-        db_path = settings.DATABASES['default']['NAME']
-        
-        if not os.path.exists(db_path):
+        # Check if the database file exists (cached)
+        if not presence.is_present():
             # If DB is missing, force redirect to setup
             return redirect('setup_database')
 
+        overhead_ms = (time.perf_counter() - start) * 1000
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        # Report our own cost alongside any other Server-Timing entries
+        timing = f"dbcheck;dur={overhead_ms:.3f}"
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+        return response
@@ -0,0 +1,211 @@
+"""
+Data-versioned response cache for the analytics pages.
+
+Responses are keyed by (active database file, data version, user, path,
+query string). The data version is the database's own DataStamp
+(monitor.models): a random file id plus a change counter that SQLite
+triggers bump on every write, so it survives restarts and changes with the
+file. It is read once per request (a single-row lookup) rather than tracked
+through model signals, which bulk_update, QuerySet.update, raw SQL, the
+rebuild commands and other processes all bypass. A write never has to find
+and delete stale entries: they just stop being addressed.
+
+Two tiers: an in-memory LRU capped by total body size, backed by the
+"analytics" cache (user_monitoring/disk_cache.py) in the data directory.
+warm() pulls the active file's entries from disk after a restart and prunes
+the ones written for older versions.
+
+Every response carries an ETag derived from the version, so the WebView's
+conditional GETs get a 304 without touching the view, even for streamed
+responses that are never stored. There is no Last-Modified: the version is a
+counter, not a time, and a clock in this process would not see writes made
+by others.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+logger = logging.getLogger("LifeMonitor")
+
+DISK_CACHE_ALIAS = "analytics"
+
+CachedResponse = namedtuple("CachedResponse", "content status headers")
+
+# Headers worth replaying from a stored response
+_KEPT_HEADERS = ("Content-Type", "Content-Disposition", "Content-Language")
+
+
+def data_token():
+    """'<file id>.<change counter>' of the default database, or None without a stamp."""
+    from monitor.models import DataStamp
+
+    stamp = DataStamp.objects.order_by("pk").values_list("file_id", "version").first()
+    return f"{stamp[0]}.{stamp[1]}" if stamp else None
+
+
+class ResponseCache:
+    """LRU of CachedResponse, evicting oldest entries past `max_bytes` of content."""
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = 0
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            return getattr(settings, "RESPONSE_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+        return self._max_bytes
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry):
+        if len(entry.content) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old.content)
+            self._entries[key] = entry
+            self.size += len(entry.content)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.content)
+
+    def drop_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self.size -= len(self._entries.pop(key).content)
+
+    def on_database_switched(self, previous=None, **kwargs):
+        if previous is not None:
+            self.drop_prefix(database_prefix(previous))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = ResponseCache()
+
+
+def database_prefix(path):
+    return f"resp:{hashlib.sha1(str(path).encode()).hexdigest()[:12]}:"
+
+
+def _disk_cache():
+    """The persistent tier, or None when unconfigured or the database is in memory (tests)."""
+    if DISK_CACHE_ALIAS not in settings.CACHES:
+        return None
+    if connection.creation.is_in_memory_db(settings.DATABASES["default"]["NAME"]):
+        return None
+    return caches[DISK_CACHE_ALIAS]
+
+
+def _disk_call(method, *args):
+    # A damaged or locked cache file only costs a recompute
+    try:
+        return method(*args)
+    except sqlite3.Error as e:
+        logger.warning(f"Analytics disk cache unavailable: {e}")
+        return None
+
+
+def _cache_key(request, token):
+    request_part = repr((request.user.pk, request.path, sorted((k, v) for k, v in request.GET.lists())))
+    return (
+        f"{database_prefix(settings.DATABASES['default']['NAME'])}{token}:"
+        f"{hashlib.sha1(request_part.encode()).hexdigest()}"
+    )
+
+
+def warm():
+    """
+    Load the active database's current entries from disk into memory and drop
+    its entries for older versions. Called from the shell once Django is up.
+    Returns the number of entries loaded.
+    """
+    disk = _disk_cache()
+    token = data_token()
+    if disk is None or token is None:
+        return 0
+    prefix = database_prefix(settings.DATABASES["default"]["NAME"])
+    disk.delete_prefix(prefix, keep=f"{prefix}{token}:")
+    entries = disk.get_prefix(f"{prefix}{token}:")
+    for key, entry in entries.items():
+        cache.set(key, entry)
+    return len(entries)
+
+
+def data_cached(view):
+    """
+    Serve a GET from the response cache, or answer 304 to a conditional GET,
+    while the database file and data version are unchanged. Put it under
+    @login_required so redirects are never cached.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+
+        token = data_token()
+        if token is None:
+            return view(request, *args, **kwargs)
+        key = _cache_key(request, token)
+        etag = quote_etag(hashlib.sha1(key.encode()).hexdigest()[:20])
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        disk = _disk_cache()
+        entry = cache.get(key)
+        if entry is None and disk is not None:
+            entry = _disk_call(disk.get, key)
+            if entry is not None:
+                cache.set(key, entry)
+        if entry is not None:
+            response = HttpResponse(entry.content, status=entry.status)
+            for header, value in entry.headers:
+                response[header] = value
+        else:
+            response = view(request, *args, **kwargs)
+            # Streams are never buffered; responses setting cookies are per-visit
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                headers = [(h, response[h]) for h in _KEPT_HEADERS if response.has_header(h)]
+                entry = CachedResponse(response.content, response.status_code, headers)
+                cache.set(key, entry)
+                if disk is not None:
+                    _disk_call(disk.set, key, entry)
+
+        if response.status_code == 200:
+            response["ETag"] = etag
+            # Let the WebView keep a copy but always revalidate it
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return wrapper
@@ -0,0 +1,63 @@
+"""
+Cheap "is migrate a no-op?" check used on cold start.
+
+`migrate` imports every migration module, builds the graph and fires
+post_migrate (contenttypes + permissions queries) even when nothing changed.
+Here we only list the migration files shipped with the code and compare
+their fingerprint with the set recorded in the database's own
+django_migrations table, so the answer travels with the SQLite file when the
+user switches or uploads databases.
+"""
+import hashlib
+import importlib
+import pkgutil
+
+from django.apps import apps
+from django.db import DatabaseError, connections, DEFAULT_DB_ALIAS
+
+
+def disk_migrations():
+    """Set of (app_label, name) for every migration file shipped with the code."""
+    keys = set()
+    for app_config in apps.get_app_configs():
+        try:
+            module = importlib.import_module(f"{app_config.name}.migrations")
+        except ImportError:
+            continue
+        if not hasattr(module, "__path__"):
+            continue
+        # Same discovery rule as django.db.migrations.loader.MigrationLoader
+        for _, name, is_pkg in pkgutil.iter_modules(module.__path__):
+            if not is_pkg and name[0] not in "_~":
+                keys.add((app_config.label, name))
+    return keys
+
+
+def applied_migrations(using=DEFAULT_DB_ALIAS):
+    """Set of (app, name) recorded in django_migrations, or None if it doesn't exist yet."""
+    try:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT app, name FROM django_migrations")
+            return set(cursor.fetchall())
+    except DatabaseError:
+        return None
+
+
+def fingerprint(keys):
+    digest = hashlib.sha256()
+    for app_label, name in sorted(keys):
+        digest.update(f"{app_label}.{name}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def schema_is_current(using=DEFAULT_DB_ALIAS):
+    """
+    Returns (is_current, code_fingerprint).
+    True when every shipped migration is already applied to the database,
+    i.e. running migrate would do nothing.
+    """
+    expected = disk_migrations()
+    applied = applied_migrations(using)
+    if applied is None:
+        return False, fingerprint(expected)
+    return expected <= applied, fingerprint(expected)
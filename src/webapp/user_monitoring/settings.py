@@ -4,6 +4,7 @@ Django settings for user_monitoring project.
 
 from pathlib import Path
 import os
+import sys
 import json
 from decouple import config
 
@@ -95,11 +96,36 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': current_db_path,
+        # Keep one connection per worker thread instead of reconnecting per request
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# PRAGMA preset applied on connect (see user_monitoring/db_profile.py)
+SQLITE_PROFILE = os.environ.get(
+    "LIFEMONITOR_SQLITE_PROFILE",
+    "android-low-memory" if sys.platform == "android" else "desktop",
+)
 
-AUTH_PASSWORD_VALIDATORS = [monitor
+# Memory cap for cached analytics responses (see user_monitoring/response_cache.py)
+RESPONSE_CACHE_MAX_BYTES = 4 * 1024 * 1024 if sys.platform == "android" else 16 * 1024 * 1024
+
+# Analytics responses persisted next to db_config.json, so a restart starts warm
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "analytics": {
+        "BACKEND": "user_monitoring.disk_cache.SQLiteCache",
+        "LOCATION": DB_CONFIG_FILE.parent / "cache" / "analytics.sqlite3",
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 500},
+    },
+}
+
+
+AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
     },
@@ -124,6 +150,15 @@ STATICFILES_DIRS = [
     BASE_DIR / "monitor/static",
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Hashed names come from the in-memory asset table, so collectstatic isn't needed
+WHITENOISE_USE_FINDERS = True
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "user_monitoring.storage.PreloadedManifestStorage",
+    },
+}
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
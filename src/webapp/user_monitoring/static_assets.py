@@ -0,0 +1,126 @@
+"""
+Preloaded static asset table.
+
+Every file under the project's static folder is read once, gzipped once and
+given a content-hashed alias (css/styles.<md5>.css, same scheme as Django's
+ManifestStaticFilesStorage). The native shell answers /static/ from this
+table before Django is even loaded, so assets also work in LOADING mode and
+don't need collectstatic.
+
+This module must not touch django.conf.settings: the shell builds the table
+before django.setup() runs.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+STATIC_URL = "/static/"
+STATIC_SOURCE_DIRS = [Path(__file__).resolve().parent.parent / "monitor" / "static"]
+
+# Set by the shell; makes {% static %} emit the hashed, immutable URLs
+ENV_FLAG = "LIFEMONITOR_STATIC_CACHE"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+Asset = namedtuple("Asset", "body gzip_body content_type etag immutable")
+
+
+def content_hash(content):
+    return hashlib.md5(content).hexdigest()[:12]
+
+
+def hashed_name(name, content):
+    root, ext = posixpath.splitext(name)
+    return f"{root}.{content_hash(content)}{ext}"
+
+
+def parse_etags(header):
+    """Entity tags listed in an If-None-Match header; weak tags compare equal (RFC 9110)."""
+    tags = [tag.strip() for tag in header.split(",") if tag.strip()]
+    return [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+class StaticAssetTable:
+    def __init__(self, source_dirs=STATIC_SOURCE_DIRS, url_prefix=STATIC_URL):
+        self.url_prefix = url_prefix
+        self.assets = {}
+        self.manifest = {}
+        for source_dir in source_dirs:
+            self._load_dir(Path(source_dir))
+
+    def _load_dir(self, source_dir):
+        for dirpath, _, filenames in os.walk(source_dir):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                name = path.relative_to(source_dir).as_posix()
+                # First directory wins, like the staticfiles finders
+                if name in self.manifest:
+                    continue
+                self._add(name, path.read_bytes())
+
+    def _add(self, name, body):
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+
+        gzip_body = None
+        if content_type.startswith(COMPRESSIBLE_TYPES) and len(body) > 256:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                gzip_body = compressed
+
+        hashed = hashed_name(name, body)
+        etag = content_hash(body)
+        self.manifest[name] = hashed
+        self.assets[self.url_prefix + name] = Asset(body, gzip_body, content_type, etag, False)
+        self.assets[self.url_prefix + hashed] = Asset(body, gzip_body, content_type, etag, True)
+
+    def total_bytes(self):
+        return sum(len(a.body) for a in self.assets.values()) // 2
+
+    def serve(self, environ, start_response):
+        """WSGI responder; returns None when the path isn't a preloaded asset."""
+        asset = self.assets.get(environ.get("PATH_INFO", ""))
+        method = environ.get("REQUEST_METHOD", "GET")
+        if asset is None or method not in ("GET", "HEAD"):
+            return None
+
+        use_gzip = asset.gzip_body is not None and "gzip" in environ.get("HTTP_ACCEPT_ENCODING", "")
+        etag = f'"{asset.etag}-gz"' if use_gzip else f'"{asset.etag}"'
+        headers = [
+            ("Content-Type", asset.content_type),
+            ("ETag", etag),
+            ("Vary", "Accept-Encoding"),
+            ("Cache-Control", "public, max-age=31536000, immutable" if asset.immutable else "no-cache"),
+        ]
+
+        if_none_match = parse_etags(environ.get("HTTP_IF_NONE_MATCH", ""))
+        if "*" in if_none_match or etag in if_none_match:
+            start_response("304 Not Modified", headers)
+            return [b""]
+
+        body = asset.gzip_body if use_gzip else asset.body
+        if use_gzip:
+            headers.append(("Content-Encoding", "gzip"))
+        headers.append(("Content-Length", str(len(body))))
+        start_response("200 OK", headers)
+        return [b"" if method == "HEAD" else body]
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    """Shared table, built on first use."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = StaticAssetTable()
+    return _table
@@ -0,0 +1,19 @@
+import os
+
+from django.contrib.staticfiles.storage import StaticFilesStorage
+
+from .static_assets import ENV_FLAG, get_table
+
+
+class PreloadedManifestStorage(StaticFilesStorage):
+    """
+    Inside the native shell, {% static %} points at the content-hashed names
+    served from the preloaded table (long-lived, immutable). Elsewhere
+    (runserver, tests) it behaves like the plain StaticFilesStorage, so no
+    collectstatic manifest is ever required.
+    """
+
+    def url(self, name):
+        if os.environ.get(ENV_FLAG):
+            name = get_table().manifest.get(name, name)
+        return super().url(name)
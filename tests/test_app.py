@@ -1,3 +1,73 @@
 def test_first():
     "An initial test for the app"
     assert 1 + 1 == 2
+
+
+def make_shell(mode):
+    "A Lifemonitor with just the request-handling state (no native window)"
+    import threading
+    from lifemonitor.app import Lifemonitor
+
+    shell = Lifemonitor.__new__(Lifemonitor)
+    shell.server_mode = mode
+    shell.django_app = None
+    shell.setup_error = None
+    shell.static_assets = None
+    shell.boot_events = []
+    shell._boot_cond = threading.Condition()
+    return shell
+
+
+def call(shell, path, query=""):
+    status = []
+    body = shell.master_wsgi_handler(
+        {"PATH_INFO": path, "QUERY_STRING": query},
+        lambda s, headers: status.append(s),
+    )
+    return status[0], b"".join(body)
+
+
+def test_ready_poll_is_released_by_mode_change():
+    "A waiting long-poll returns as soon as Django is ready"
+    import json
+    import threading
+
+    shell = make_shell("LOADING")
+    shell.set_boot_stage("setup", "Loading app modules...")
+    threading.Timer(0.1, shell.set_boot_stage, ("ready", "Ready"), {"mode": "DJANGO"}).start()
+
+    status, body = call(shell, "/__lifemonitor__/ready", "since=1")
+    data = json.loads(body)
+    assert status == "200 OK"
+    assert data["mode"] == "DJANGO"
+    assert data["events"] == [{"stage": "ready", "message": "Ready"}]
+    assert data["next"] == 2
+
+
+def test_error_mode_reports_failure():
+    "ERROR mode shows the failure instead of 'Unknown State'"
+    shell = make_shell("LOADING")
+    shell.setup_error = "disk I/O error <db>"
+    shell.set_boot_stage("error", shell.setup_error, mode="ERROR")
+
+    status, body = call(shell, "/")
+    assert status.startswith("500")
+    assert b"disk I/O error &lt;db&gt;" in body
+
+
+def test_failed_django_init_stops_import_timing(monkeypatch):
+    "A boot that ends in ERROR never serves a first request, so init_django finishes the profile"
+    import sys
+    from lifemonitor import app
+    from lifemonitor.boot import BootProfiler
+
+    profiler = BootProfiler()
+    profiler.start()
+    monkeypatch.setattr(app, "boot_profiler", profiler)
+    monkeypatch.setattr(app.django, "setup", lambda **kwargs: 1 / 0)
+    shell = make_shell("LOADING")
+    shell.init_django()
+
+    assert shell.server_mode == "ERROR"
+    assert profiler.finished
+    assert profiler._timer not in sys.meta_path
@@ -0,0 +1,90 @@
+import json
+import sys
+
+from lifemonitor.boot import BootProfiler
+
+
+def test_phases_and_marks_are_recorded():
+    profiler = BootProfiler()
+    with profiler.phase("migrate"):
+        pass
+    profiler.mark("django_ready")
+    report = profiler.report()
+    assert report["phases"][0]["name"] == "migrate"
+    assert profiler.phase_ms("migrate") >= 0
+    assert "django_ready" in report["marks"]
+
+
+def test_import_cost_is_captured(tmp_path, monkeypatch):
+    (tmp_path / "boot_probe_child.py").write_text("X = 1\n")
+    (tmp_path / "boot_probe_parent.py").write_text("import boot_probe_child\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = BootProfiler()
+    profiler.start()
+    try:
+        import boot_probe_parent  # noqa: F401
+    finally:
+        profiler.finish()
+        sys.modules.pop("boot_probe_parent", None)
+        sys.modules.pop("boot_probe_child", None)
+
+    modules = {i["module"]: i for i in profiler.report()["imports"]["top"]}
+    assert "boot_probe_child" in modules
+    parent = modules["boot_probe_parent"]
+    assert parent["cumulative_ms"] >= parent["self_ms"]
+    assert profiler._timer not in sys.meta_path
+    json.loads(profiler.to_json())
+
+
+def test_shared_loader_is_wrapped_once(tmp_path, monkeypatch):
+    import importlib.abc
+    import importlib.util
+
+    class SharedLoader(importlib.abc.Loader):
+        def create_module(self, spec):
+            return None
+
+        def exec_module(self, module):
+            module.VALUE = module.__name__
+
+    loader = SharedLoader()
+
+    class Finder:
+        def find_spec(self, fullname, path=None, target=None):
+            if fullname.startswith("boot_shared_"):
+                return importlib.util.spec_from_loader(fullname, loader)
+            return None
+
+    finder = Finder()
+    monkeypatch.setattr(sys, "meta_path", [finder] + sys.meta_path)
+    profiler = BootProfiler()
+    profiler.start()
+    try:
+        import boot_shared_a  # noqa: F401
+        wrapped = loader.exec_module
+        import boot_shared_b  # noqa: F401
+        assert loader.exec_module is wrapped
+    finally:
+        profiler.finish()
+        sys.modules.pop("boot_shared_a", None)
+        sys.modules.pop("boot_shared_b", None)
+
+    names = sorted(i["module"] for i in profiler.report()["imports"]["top"])
+    assert names == ["boot_shared_a", "boot_shared_b"]
+    assert profiler._timer not in sys.meta_path
+    # Imports after boot are no longer recorded
+    import boot_shared_c  # noqa: F401
+    sys.modules.pop("boot_shared_c", None)
+    assert profiler.report()["imports"]["count"] == 2
+
+
+def test_finish_removes_hook_even_if_report_fails(monkeypatch):
+    profiler = BootProfiler()
+    profiler.start()
+    monkeypatch.setattr(profiler, "report", lambda top=50: 1 / 0)
+    try:
+        profiler.finish()
+    except ZeroDivisionError:
+        pass
+    assert profiler._timer not in sys.meta_path
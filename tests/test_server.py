@@ -0,0 +1,108 @@
+import http.client
+import threading
+import time
+
+from lifemonitor.server import PooledWSGIServer, make_server
+
+
+def hello_app(environ, start_response):
+    start_response('200 OK', [('Content-type', 'text/plain')])
+    return [b"hello"]
+
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.socket.getsockname()
+
+
+def test_pooled_server_keeps_connection_alive():
+    "Several requests share one HTTP/1.1 connection"
+    server = make_server(hello_app, backend="pooled")
+    host, port = start(server)
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        for _ in range(3):
+            conn.request("GET", "/")
+            response = conn.getresponse()
+            assert response.status == 200
+            assert response.read() == b"hello"
+            assert response.getheader("Connection") != "close"
+        sock = conn.sock
+        conn.request("GET", "/")
+        conn.getresponse().read()
+        assert conn.sock is sock
+        conn.close()
+    finally:
+        server.close_gracefully()
+
+
+def test_pooled_server_rejects_when_queue_is_full():
+    "A saturated pool answers 503 instead of queueing forever"
+    release = threading.Event()
+
+    def slow_app(environ, start_response):
+        release.wait(5)
+        return hello_app(environ, start_response)
+
+    server = PooledWSGIServer(("127.0.0.1", 0), workers=1, queue_size=1, queue_timeout=0.1)
+    server.set_app(slow_app)
+    host, port = start(server)
+    try:
+        conns = [http.client.HTTPConnection(host, port, timeout=5) for _ in range(3)]
+        for conn in conns:
+            conn.request("GET", "/")
+            time.sleep(0.2)
+        assert conns[2].getresponse().status == 503
+        release.set()
+        assert conns[0].getresponse().status == 200
+        for conn in conns:
+            conn.close()
+    finally:
+        release.set()
+        server.close_gracefully()
+
+
+def test_graceful_shutdown_joins_workers():
+    "close_gracefully stops the workers"
+    server = make_server(hello_app, backend="pooled")
+    start(server)
+    server.close_gracefully()
+    assert not any(t.is_alive() for t in server._workers)
+
+
+def test_shutdown_with_a_full_queue_does_not_block():
+    "server_close never waits on a full queue, and what was queued is still served"
+    release = threading.Event()
+
+    def slow_app(environ, start_response):
+        release.wait(5)
+        return hello_app(environ, start_response)
+
+    server = PooledWSGIServer(("127.0.0.1", 0), workers=1, queue_size=1, queue_timeout=0.1)
+    server.set_app(slow_app)
+    host, port = start(server)
+    conns = [http.client.HTTPConnection(host, port, timeout=5) for _ in range(2)]
+    for conn in conns:
+        conn.request("GET", "/")
+        time.sleep(0.2)
+    assert server.is_saturated()
+    server.shutdown()
+    closing = threading.Thread(target=server.server_close)
+    closing.start()
+    closing.join(1)
+    assert not closing.is_alive()
+    release.set()
+    for conn in conns:
+        assert conn.getresponse().status == 200
+        conn.close()
+    for t in server._workers:
+        t.join(5)
+    assert not any(t.is_alive() for t in server._workers)
+
+
+def test_unknown_backend_falls_back_to_pooled():
+    server = make_server(hello_app, backend="nope")
+    try:
+        assert isinstance(server, PooledWSGIServer)
+    finally:
+        server.server_close()